@@ -2,42 +2,70 @@
 
 from .backends import QueueBackend
 from .fs_queue import FilesystemQueue
-from .lease import LeaseManager
+from .inproc_queue import InProcQueue
+from .lease import FlockLeaseManager, LeaseManager
 from .runner import Worker, WorkerRunner
 from .scheduler import TaskScheduler
+from .sqlite_queue import SQLiteQueue
 from .types import Result, Task
-from .workers import HeuristicEntityResolver, IngestSocialWorker, JsonlStoreAdapter, ResolveEntityWorker
-from .workers import M1JsonlStore, ProfilerWorker, RouterWorker, ScorerWorker
-from .workers import ApprovalWorker, DigestWorker, DrafterWorker, M2JsonlStore
-from .workers import (
-    CalibrationReporterWorker,
-    CalibrationReviewWorker,
-    FailureAnalystWorker,
-    M3JsonlStore,
-    OutcomeEvaluatorWorker,
-)
-from .workers import ingest_manual_outcomes, run_demo_once, seed_resolved_entities
-from .workers import (
-    PromiseCalibrationWorker,
-    PromiseEvaluatorWorker,
-    ResolveTokenWorker,
-    TokenHealthScorerWorker,
-    TokenPromiseStore,
-    run_local_token_promises,
-)
-from .workers import (
-    ProjectRewardsWorker,
-    PublishSeasonSummaryWorker,
-    S1JsonlStore,
-    SettleSeasonWorker,
-    UpdateAttentionScoresWorker,
-    run_local_s1,
+
+_WORKER_EXPORTS = frozenset(
+    {
+        "HeuristicEntityResolver",
+        "IngestSocialWorker",
+        "JsonlStoreAdapter",
+        "ResolveEntityWorker",
+        "M1JsonlStore",
+        "ProfilerWorker",
+        "RouterWorker",
+        "ScorerWorker",
+        "ApprovalWorker",
+        "DigestWorker",
+        "DrafterWorker",
+        "M2JsonlStore",
+        "CalibrationReporterWorker",
+        "CalibrationReviewWorker",
+        "FailureAnalystWorker",
+        "M3JsonlStore",
+        "OutcomeEvaluatorWorker",
+        "ingest_manual_outcomes",
+        "run_demo_once",
+        "seed_resolved_entities",
+        "PromiseCalibrationWorker",
+        "PromiseEvaluatorWorker",
+        "ResolveTokenWorker",
+        "TokenHealthScorerWorker",
+        "TokenPromiseStore",
+        "run_local_token_promises",
+        "ProjectRewardsWorker",
+        "PublishSeasonSummaryWorker",
+        "S1JsonlStore",
+        "SettleSeasonWorker",
+        "UpdateAttentionScoresWorker",
+        "run_local_s1",
+    }
 )
 
+
+def __getattr__(name: str):
+    # Worker templates are imported on first access so that runtime-only
+    # consumers (and the CLI) do not pay for loading every pipeline module.
+    if name not in _WORKER_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from . import workers
+
+    value = getattr(workers, name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "FilesystemQueue",
+    "FlockLeaseManager",
+    "InProcQueue",
     "LeaseManager",
     "QueueBackend",
+    "SQLiteQueue",
     "Task",
     "Result",
     "TaskScheduler",
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when the optional extra is absent
+    orjson = None
+
+
+def _stdlib_dumps(payload: Any) -> bytes:
+    text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    try:
+        return text.encode("utf-8")
+    except UnicodeEncodeError:
+        # Lone surrogates have no UTF-8 form; \u escapes keep them round-tripping.
+        return json.dumps(payload, separators=(",", ":")).encode("ascii")
+
+
+def _has_non_finite(value: Any) -> bool:
+    if type(value) is float:
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(v) for v in value)
+    return False
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(payload: Any) -> bytes:
+        # Anything orjson rejects (ints beyond 64 bits, lone surrogates, other
+        # types json accepts) or would silently turn into null (NaN and the
+        # infinities) goes through the stdlib encoder, as it always did.
+        try:
+            data = orjson.dumps(payload, option=_OPTIONS)
+        except TypeError:
+            return _stdlib_dumps(payload)
+        if b"null" in data and _has_non_finite(payload):
+            return _stdlib_dumps(payload)
+        return data
+
+    def loads(data: bytes | str) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN, Infinity and escaped lone surrogates, as written above.
+            return json.loads(data)
+
+else:
+    dumps = _stdlib_dumps
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Protocol
 
@@ -7,24 +8,32 @@ from .types import Result, RunRecord, Task
 
 
 class QueueBackend(Protocol):
+    # WorkerRunner also uses lease_next_tasks(owner=, lease_seconds=, n=),
+    # finalize_task(leased_path, result, record) and flush() when a backend
+    # provides them, and falls back to the methods below otherwise.
     worker_name: str
 
-    def enqueue_task(self, task: Task, *, scheduled_for=None) -> Path:
+    # Task handles are inbox paths for FilesystemQueue and task ids for the
+    # SQLite and in-process queues; results and runs are paths or row ids.
+    def enqueue_task(self, task: Task, *, scheduled_for=None) -> str | Path:
         ...
 
-    def lease_next_task(self, *, owner: str, lease_seconds: int) -> tuple[Task, Path] | None:
+    def enqueue_tasks(self, tasks: Iterable[Task], *, scheduled_for=None) -> list[str] | list[Path]:
         ...
 
-    def ack_task(self, leased_path: Path) -> None:
+    def lease_next_task(self, *, owner: str, lease_seconds: int) -> tuple[Task, str | Path] | None:
         ...
 
-    def fail_task(self, leased_path: Path, task: Task, error: str) -> None:
+    def ack_task(self, leased_path: str | Path) -> None:
         ...
 
-    def write_result(self, result: Result) -> Path:
+    def fail_task(self, leased_path: str | Path, task: Task, error: str) -> None:
         ...
 
-    def write_run_record(self, record: RunRecord) -> Path:
+    def write_result(self, result: Result) -> int | Path:
+        ...
+
+    def write_run_record(self, record: RunRecord) -> int | Path:
         ...
 
     def stats(self) -> dict[str, int]:
@@ -1,50 +1,69 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import importlib
 import json
+import re
 import sys
 from pathlib import Path
 
 from .fs_queue import FilesystemQueue
 from .runner import RunnerConfig, WorkerRunner
-from .workers import (
-    run_demo_once,
-    run_local_m0,
-    run_local_m1,
-    run_local_m2,
-    run_local_m3,
-    run_local_s1,
-    run_local_token_promises,
-)
+from .sqlite_queue import SQLiteQueue
 
 
-def _load_worker(spec: str):
+@functools.lru_cache(maxsize=None)
+def _resolve_spec(spec: str) -> tuple[object, bool]:
     if ":" not in spec:
         raise ValueError("Worker must be import path in form module:attr")
     module_name, attr = spec.split(":", 1)
     module = importlib.import_module(module_name)
-    worker = getattr(module, attr)
-    if isinstance(worker, type):
-        worker = worker()
+    target = getattr(module, attr)
+    return target, isinstance(target, type)
+
+
+def _load_worker(spec: str):
+    target, is_type = _resolve_spec(spec)
+    worker = target() if is_type else target
     if not hasattr(worker, "name") or not hasattr(worker, "handle"):
         raise ValueError("Loaded worker must expose name and handle(task)")
     return worker
 
 
+def _open_queue(
+    backend: str,
+    *,
+    workspace: Path,
+    worker_name: str,
+    thread_safe: bool = True,
+    background_writes: bool = False,
+):
+    if backend == "sqlite":
+        return SQLiteQueue(workspace=workspace, worker_name=worker_name)
+    return FilesystemQueue(
+        workspace=workspace,
+        worker_name=worker_name,
+        thread_safe=thread_safe,
+        background_writes=background_writes,
+    )
+
+
+_EVERY_RE = re.compile(r"\s*(\d+)\s*(ms|s|m|h)?\s*", re.IGNORECASE)
+_EVERY_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
 def _parse_every(raw: str | None) -> int | None:
     if raw is None:
         return None
-    raw = raw.strip().lower()
-    if raw.endswith("ms"):
-        return max(1, int(raw[:-2]) // 1000)
-    if raw.endswith("s"):
-        return int(raw[:-1])
-    if raw.endswith("m"):
-        return int(raw[:-1]) * 60
-    if raw.endswith("h"):
-        return int(raw[:-1]) * 3600
-    return int(raw)
+    match = _EVERY_RE.fullmatch(raw)
+    if match is None:
+        raise ValueError(f"Invalid --every value: {raw!r}")
+    value = int(match[1])
+    unit = (match[2] or "").lower()
+    if unit == "ms":
+        return max(1, value // 1000)
+    return value * _EVERY_UNITS[unit]
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -60,7 +79,10 @@ def build_parser() -> argparse.ArgumentParser:
     run_p.add_argument("--max-tasks", type=int, default=None)
     run_p.add_argument("--parallel", type=int, default=1)
     run_p.add_argument("--lease-seconds", type=int, default=120)
+    run_p.add_argument("--max-poll-interval", type=float, default=None, help="Back off idle polling up to this many seconds")
     run_p.add_argument("--once", action="store_true")
+    run_p.add_argument("--backend", choices=["fs", "sqlite"], default="fs")
+    run_p.add_argument("--background-writes", action="store_true", help="Publish fs queue files from a writer pool")
 
     queue_p = sub.add_parser("queue")
     queue_sub = queue_p.add_subparsers(dest="queue_cmd", required=True)
@@ -68,17 +90,20 @@ def build_parser() -> argparse.ArgumentParser:
     stats_p = queue_sub.add_parser("stats")
     stats_p.add_argument("worker")
     stats_p.add_argument("--workspace", default=".")
+    stats_p.add_argument("--backend", choices=["fs", "sqlite"], default="fs")
 
     retry_p = queue_sub.add_parser("retry")
     retry_p.add_argument("worker")
     retry_p.add_argument("--workspace", default=".")
     retry_p.add_argument("--task-id", default=None)
+    retry_p.add_argument("--backend", choices=["fs", "sqlite"], default="fs")
 
     deadletter_p = queue_sub.add_parser("deadletter")
     deadletter_sub = deadletter_p.add_subparsers(dest="deadletter_cmd", required=True)
     dl_list_p = deadletter_sub.add_parser("list")
     dl_list_p.add_argument("worker")
     dl_list_p.add_argument("--workspace", default=".")
+    dl_list_p.add_argument("--backend", choices=["fs", "sqlite"], default="fs")
 
     m0_p = sub.add_parser("m0")
     m0_sub = m0_p.add_subparsers(dest="m0_cmd", required=True)
@@ -120,6 +145,7 @@ def build_parser() -> argparse.ArgumentParser:
     demo_run_p.add_argument("--channel", default=None)
     demo_run_p.add_argument("--max-attempts", type=int, default=1)
     demo_run_p.add_argument("--resolved-entities-jsonl", default=None)
+    demo_run_p.add_argument("--persist", action="store_true", help="Keep demo tasks in on-disk queue folders")
     demo_run_p.add_argument("--outcomes-jsonl", default=None)
 
     token_p = sub.add_parser("token")
@@ -139,114 +165,204 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _cmd_worker_run(args: argparse.Namespace) -> int:
+    worker = _load_worker(args.worker)
+    queue = _open_queue(
+        args.backend,
+        workspace=Path(args.workspace),
+        worker_name=worker.name,
+        thread_safe=args.parallel > 1,
+        background_writes=args.background_writes,
+    )
+    cfg = RunnerConfig(
+        every_seconds=_parse_every(args.every),
+        max_tasks=args.max_tasks,
+        parallel=args.parallel,
+        lease_seconds=args.lease_seconds,
+        once=args.once,
+        max_poll_interval_seconds=args.max_poll_interval,
+    )
+    with WorkerRunner(queue=queue, worker=worker, config=cfg) as runner:
+        processed = runner.run()
+    print(json.dumps({"processed": processed}))
+    return 0
+
+
+def _cmd_queue_stats(args: argparse.Namespace) -> int:
+    queue = _open_queue(args.backend, workspace=Path(args.workspace), worker_name=args.worker)
+    print(json.dumps(queue.stats()))
+    return 0
+
+
+def _cmd_queue_retry(args: argparse.Namespace) -> int:
+    queue = _open_queue(args.backend, workspace=Path(args.workspace), worker_name=args.worker)
+    retried = queue.retry_deadletter(task_id=args.task_id)
+    print(json.dumps({"retried": retried}))
+    return 0
+
+
+def _cmd_queue_deadletter(args: argparse.Namespace) -> int:
+    queue = _open_queue(args.backend, workspace=Path(args.workspace), worker_name=args.worker)
+    items = [str(p) for p in queue.deadletter_items()]
+    print(json.dumps({"items": items}))
+    return 0
+
+
+def _cmd_m0_run_local(args: argparse.Namespace) -> int:
+    from .workers.m0 import run_local_m0
+
+    summary = run_local_m0(
+        workspace=Path(args.workspace),
+        input_jsonl_path=Path(args.input_jsonl),
+        max_records=args.max_records,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_m1_run_local(args: argparse.Namespace) -> int:
+    from .workers.m1 import run_local_m1
+
+    summary = run_local_m1(
+        workspace=Path(args.workspace),
+        limit=args.limit,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_m2_run_local(args: argparse.Namespace) -> int:
+    from .workers.m2 import run_local_m2
+
+    summary = run_local_m2(
+        workspace=Path(args.workspace),
+        window_key=args.window_key,
+        top_n=args.top_n,
+        channel=args.channel,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_m3_run_local(args: argparse.Namespace) -> int:
+    from .workers.m3 import run_local_m3
+
+    summary = run_local_m3(
+        workspace=Path(args.workspace),
+        window_start=args.window_start,
+        window_end=args.window_end,
+        success_within_hours=args.success_within_hours,
+        auto_review_decision=args.auto_review_decision,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_demo_run_once(args: argparse.Namespace) -> int:
+    from .workers.demo import run_demo_once
+
+    summary = run_demo_once(
+        workspace=Path(args.workspace),
+        window_key=args.window_key,
+        limit=args.limit,
+        top_n=args.top_n,
+        channel=args.channel,
+        max_attempts=args.max_attempts,
+        resolved_entities_jsonl=Path(args.resolved_entities_jsonl) if args.resolved_entities_jsonl else None,
+        outcomes_jsonl=Path(args.outcomes_jsonl) if args.outcomes_jsonl else None,
+        persist=args.persist,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_token_run_local(args: argparse.Namespace) -> int:
+    from .workers.token_promises import run_local_token_promises
+
+    summary = run_local_token_promises(
+        workspace=Path(args.workspace),
+        window_key=args.window_key,
+        limit=args.limit,
+        baseline_weight=args.baseline_weight,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_s1_run_local(args: argparse.Namespace) -> int:
+    from .workers.s1 import run_local_s1
+
+    summary = run_local_s1(
+        workspace=Path(args.workspace),
+        date=args.date,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+_DISPATCH = {
+    ("worker", "run"): _cmd_worker_run,
+    ("queue", "stats"): _cmd_queue_stats,
+    ("queue", "retry"): _cmd_queue_retry,
+    ("queue", "deadletter"): _cmd_queue_deadletter,
+    ("m0", "run-local"): _cmd_m0_run_local,
+    ("m1", "run-local"): _cmd_m1_run_local,
+    ("m2", "run-local"): _cmd_m2_run_local,
+    ("m3", "run-local"): _cmd_m3_run_local,
+    ("demo", "run-once"): _cmd_demo_run_once,
+    ("token", "run-local"): _cmd_token_run_local,
+    ("s1", "run-local"): _cmd_s1_run_local,
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_parser() -> argparse.ArgumentParser:
+    # build_parser() stays uncached since callers may extend what it returns.
+    return build_parser()
+
+
+def _fast_queue_stats_args(argv: list[str]) -> argparse.Namespace | None:
+    # `queue stats` is polled by monitoring; plain invocations skip building
+    # the full parser. Anything unusual falls back to argparse.
+    if len(argv) < 3 or argv[0] != "queue" or argv[1] != "stats" or argv[2].startswith("-"):
+        return None
+    options = {"--workspace": ".", "--backend": "fs"}
+    rest = argv[3:]
+    while rest:
+        key, sep, value = rest[0].partition("=")
+        if key not in options:
+            return None
+        if sep:
+            rest = rest[1:]
+        elif len(rest) > 1 and not rest[1].startswith("-"):
+            value, rest = rest[1], rest[2:]
+        else:
+            return None
+        options[key] = value
+    if options["--backend"] not in {"fs", "sqlite"}:
+        return None
+    return argparse.Namespace(
+        command="queue",
+        queue_cmd="stats",
+        worker=argv[2],
+        workspace=options["--workspace"],
+        backend=options["--backend"],
+    )
+
+
 def main(argv: list[str] | None = None) -> int:
-    parser = build_parser()
+    fast_args = _fast_queue_stats_args(sys.argv[1:] if argv is None else argv)
+    if fast_args is not None:
+        return _cmd_queue_stats(fast_args)
+
+    parser = _cached_parser()
     args = parser.parse_args(argv)
 
-    if args.command == "worker" and args.worker_cmd == "run":
-        worker = _load_worker(args.worker)
-        queue = FilesystemQueue(workspace=Path(args.workspace), worker_name=worker.name)
-        cfg = RunnerConfig(
-            every_seconds=_parse_every(args.every),
-            max_tasks=args.max_tasks,
-            parallel=args.parallel,
-            lease_seconds=args.lease_seconds,
-            once=args.once,
-        )
-        runner = WorkerRunner(queue=queue, worker=worker, config=cfg)
-        processed = runner.run()
-        print(json.dumps({"processed": processed}))
-        return 0
-
-    if args.command == "queue" and args.queue_cmd == "stats":
-        queue = FilesystemQueue(workspace=Path(args.workspace), worker_name=args.worker)
-        print(json.dumps(queue.stats()))
-        return 0
-
-    if args.command == "queue" and args.queue_cmd == "retry":
-        queue = FilesystemQueue(workspace=Path(args.workspace), worker_name=args.worker)
-        retried = queue.retry_deadletter(task_id=args.task_id)
-        print(json.dumps({"retried": retried}))
-        return 0
-
-    if args.command == "queue" and args.queue_cmd == "deadletter" and args.deadletter_cmd == "list":
-        queue = FilesystemQueue(workspace=Path(args.workspace), worker_name=args.worker)
-        items = [str(p) for p in queue.deadletter_items()]
-        print(json.dumps({"items": items}))
-        return 0
-
-    if args.command == "m0" and args.m0_cmd == "run-local":
-        summary = run_local_m0(
-            workspace=Path(args.workspace),
-            input_jsonl_path=Path(args.input_jsonl),
-            max_records=args.max_records,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    if args.command == "m1" and args.m1_cmd == "run-local":
-        summary = run_local_m1(
-            workspace=Path(args.workspace),
-            limit=args.limit,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    if args.command == "m2" and args.m2_cmd == "run-local":
-        summary = run_local_m2(
-            workspace=Path(args.workspace),
-            window_key=args.window_key,
-            top_n=args.top_n,
-            channel=args.channel,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    if args.command == "m3" and args.m3_cmd == "run-local":
-        summary = run_local_m3(
-            workspace=Path(args.workspace),
-            window_start=args.window_start,
-            window_end=args.window_end,
-            success_within_hours=args.success_within_hours,
-            auto_review_decision=args.auto_review_decision,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    if args.command == "demo" and args.demo_cmd == "run-once":
-        summary = run_demo_once(
-            workspace=Path(args.workspace),
-            window_key=args.window_key,
-            limit=args.limit,
-            top_n=args.top_n,
-            channel=args.channel,
-            max_attempts=args.max_attempts,
-            resolved_entities_jsonl=Path(args.resolved_entities_jsonl) if args.resolved_entities_jsonl else None,
-            outcomes_jsonl=Path(args.outcomes_jsonl) if args.outcomes_jsonl else None,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    if args.command == "token" and args.token_cmd == "run-local":
-        summary = run_local_token_promises(
-            workspace=Path(args.workspace),
-            window_key=args.window_key,
-            limit=args.limit,
-            baseline_weight=args.baseline_weight,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    if args.command == "s1" and args.s1_cmd == "run-local":
-        summary = run_local_s1(
-            workspace=Path(args.workspace),
-            date=args.date,
-        )
-        print(json.dumps(summary))
-        return 0
-
-    parser.print_help()
-    return 1
+    handler = _DISPATCH.get((args.command, getattr(args, f"{args.command}_cmd", None)))
+    if handler is None:
+        parser.print_help()
+        return 1
+    return handler(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any
+
+from .scheduler import TaskScheduler
+from .types import Result, RunRecord, Task
+
+
+def _epoch(dt: datetime | None) -> float:
+    if dt is None:
+        return time.time()
+    return dt.astimezone(timezone.utc).timestamp()
+
+
+class InProcQueue:
+    # Tasks, results and run records stay in memory and are handed over by
+    # reference; nothing is serialized. Leases are keyed by task id, as in
+    # SQLiteQueue, and only hold within the process.
+    def __init__(self, *, worker_name: str, scheduler: TaskScheduler | None = None):
+        self.worker_name = worker_name
+        self.scheduler = scheduler or TaskScheduler()
+        self._lock = threading.Lock()
+        self._tasks: dict[str, tuple[float, Task]] = {}
+        # (scheduled_for, task_id) heap; entries whose time no longer matches
+        # _tasks were superseded by a re-enqueue and are skipped.
+        self._ready: list[tuple[float, str]] = []
+        self._leased: dict[str, tuple[float, Task]] = {}
+        self._results: list[Result] = []
+        self._runs: list[RunRecord] = []
+        self._deadletter: dict[str, dict[str, Any]] = {}
+
+    def enqueue_task(self, task: Task, *, scheduled_for: datetime | None = None) -> str:
+        with self._lock:
+            self._push(task, _epoch(scheduled_for))
+        return task.task_id
+
+    def enqueue_tasks(self, tasks: Iterable[Task], *, scheduled_for: datetime | None = None) -> list[str]:
+        scheduled = _epoch(scheduled_for)
+        with self._lock:
+            return [self._push(task, scheduled) for task in tasks]
+
+    def lease_next_task(self, *, owner: str, lease_seconds: int) -> tuple[Task, str] | None:
+        leased = self.lease_next_tasks(owner=owner, lease_seconds=lease_seconds, n=1)
+        return leased[0] if leased else None
+
+    def lease_next_tasks(self, *, owner: str, lease_seconds: int, n: int) -> list[tuple[Task, str]]:
+        now = time.time()
+        leased: list[tuple[Task, str]] = []
+        with self._lock:
+            for task_id, (expires, task) in list(self._leased.items()):
+                if expires <= now:
+                    del self._leased[task_id]
+                    self._push(task, now)
+            while self._ready and len(leased) < n:
+                scheduled, task_id = self._ready[0]
+                current = self._tasks.get(task_id)
+                if current is None or current[0] != scheduled:
+                    heapq.heappop(self._ready)
+                    continue
+                if scheduled > now:
+                    break
+                heapq.heappop(self._ready)
+                task = self._tasks.pop(task_id)[1]
+                self._leased[task_id] = (now + max(1, lease_seconds), task)
+                leased.append((task, task_id))
+        return leased
+
+    def ack_task(self, leased_path: str) -> None:
+        with self._lock:
+            self._leased.pop(leased_path, None)
+
+    def fail_task(self, leased_path: str, task: Task, error: str) -> None:
+        task.attempt_count += 1
+        with self._lock:
+            self._leased.pop(leased_path, None)
+            if task.attempt_count < task.max_attempts:
+                retry_at = self.scheduler.next_retry_at(attempt_count=task.attempt_count)
+                self._push(task, _epoch(retry_at))
+                return
+            self._deadletter[task.task_id] = {
+                "task": task,
+                "final_error": error,
+                "deadlettered_at": datetime.now(timezone.utc).isoformat(),
+            }
+
+    def write_result(self, result: Result) -> int:
+        with self._lock:
+            self._results.append(result)
+            return len(self._results)
+
+    def write_run_record(self, record: RunRecord) -> int:
+        with self._lock:
+            self._runs.append(record)
+            return len(self._runs)
+
+    def finalize_task(self, leased_path: str, result: Result, record: RunRecord) -> None:
+        with self._lock:
+            self._results.append(result)
+            self._runs.append(record)
+            self._leased.pop(leased_path, None)
+
+    def flush(self) -> None:
+        pass
+
+    def snapshot(self) -> dict[str, list]:
+        with self._lock:
+            return {"results": list(self._results), "runs": list(self._runs)}
+
+    def stats(self) -> dict[str, int]:
+        now = time.time()
+        with self._lock:
+            locks = sum(1 for expires, _ in self._leased.values() if expires > now)
+            return {
+                "inbox": len(self._tasks) + len(self._leased),
+                "outbox": len(self._results),
+                "runs": len(self._runs),
+                "deadletter": len(self._deadletter),
+                "locks": locks,
+            }
+
+    def deadletter_items(self) -> list[str]:
+        with self._lock:
+            return list(self._deadletter)
+
+    def retry_deadletter(self, *, task_id: str | None = None) -> int:
+        with self._lock:
+            dead_ids = [dead_id for dead_id in self._deadletter if not task_id or dead_id == task_id]
+            now = time.time()
+            for dead_id in dead_ids:
+                task = self._deadletter.pop(dead_id)["task"]
+                task.attempt_count = 0
+                self._push(task, now)
+        return len(dead_ids)
+
+    def _push(self, task: Task, scheduled_for: float) -> str:
+        self._leased.pop(task.task_id, None)
+        self._tasks[task.task_id] = (scheduled_for, task)
+        heapq.heappush(self._ready, (scheduled_for, task.task_id))
+        return task.task_id
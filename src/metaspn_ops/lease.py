@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import json
 import os
-import tempfile
+import struct
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
 
 @dataclass(slots=True)
 class Lease:
@@ -26,77 +32,171 @@ class Lease:
         }
 
 
+# A lock file that still fails to parse after this long was left behind by a
+# writer that died mid-write, and is treated as expired.
+_PARTIAL_LOCK_GRACE_NS = 30_000_000_000
+
+_MAX_ACQUIRE_ATTEMPTS = 3
+
+_EXPIRY_CACHE_LIMIT = 4096
+
+# (acquired_ns, expires_ns), big-endian, at the start of every lease file; JSON
+# lease files written by older releases are still understood.
+_LEASE_HEADER = struct.Struct(">QQ")
+
+
+def _ns_to_datetime(ns: int) -> datetime:
+    return datetime.fromtimestamp(ns / 1_000_000_000, timezone.utc)
+
+
+def _lease_expires_ns(data: bytes) -> int | None:
+    if data[:1] == b"{":
+        try:
+            expires_at = datetime.fromisoformat(json.loads(data)["expires_at"])
+        except Exception:
+            return None
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return int(expires_at.timestamp() * 1_000_000_000)
+    if len(data) < _LEASE_HEADER.size:
+        return None
+    return _LEASE_HEADER.unpack_from(data)[1]
+
+
 class LeaseManager:
     def __init__(self, lock_dir: Path):
         self.lock_dir = lock_dir
         self.lock_dir.mkdir(parents=True, exist_ok=True)
-
-    @staticmethod
-    def _now() -> datetime:
-        return datetime.now(timezone.utc)
+        self._expiry_cache: dict[str, tuple[int, int]] = {}
 
     def _lock_path(self, task_id: str) -> Path:
         return self.lock_dir / f"{task_id}.lock"
 
     def try_acquire(self, *, task_id: str, worker_name: str, owner: str, lease_seconds: int) -> Lease | None:
-        now = self._now()
-        expires_at = now + timedelta(seconds=max(1, lease_seconds))
         lock_path = self._lock_path(task_id)
-
-        if lock_path.exists() and not self._is_expired(lock_path, now):
-            return None
-
-        lease = Lease(task_id, worker_name, owner, now, expires_at)
-
-        try:
-            tmp_path = self._write_temp_lock(lease)
-            os.link(tmp_path, lock_path)
-            tmp_path.unlink(missing_ok=True)
-            return lease
-        except FileExistsError:
-            tmp_path = locals().get("tmp_path")
-            if tmp_path is not None:
-                tmp_path.unlink(missing_ok=True)
-            if self._is_expired(lock_path, now):
+        now_ns = time.time_ns()
+        expires_ns = now_ns + max(1, lease_seconds) * 1_000_000_000
+        record = _LEASE_HEADER.pack(now_ns, expires_ns) + "\0".join((task_id, worker_name, owner)).encode("utf-8")
+        for _ in range(_MAX_ACQUIRE_ATTEMPTS):
+            try:
+                fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                if not self._is_expired(lock_path, now_ns):
+                    return None
                 self.break_lease(task_id)
-                return self.try_acquire(
-                    task_id=task_id,
-                    worker_name=worker_name,
-                    owner=owner,
-                    lease_seconds=lease_seconds,
-                )
-            return None
+                continue
+            try:
+                os.write(fd, record)
+            except BaseException:
+                os.close(fd)
+                lock_path.unlink(missing_ok=True)
+                raise
+            os.close(fd)
+            return Lease(task_id, worker_name, owner, _ns_to_datetime(now_ns), _ns_to_datetime(expires_ns))
+        return None
 
     def release(self, task_id: str) -> None:
         lock_path = self._lock_path(task_id)
-        if lock_path.exists():
-            lock_path.unlink()
+        self._expiry_cache.pop(lock_path.name, None)
+        lock_path.unlink(missing_ok=True)
 
     def break_lease(self, task_id: str) -> None:
         self.release(task_id)
 
-    def _is_expired(self, lock_path: Path, now: datetime) -> bool:
+    def _is_expired(self, lock_path: Path, now_ns: int) -> bool:
         try:
-            raw = json.loads(lock_path.read_text(encoding="utf-8"))
-            expires_at = datetime.fromisoformat(raw["expires_at"])
-            if expires_at.tzinfo is None:
-                expires_at = expires_at.replace(tzinfo=timezone.utc)
-            return expires_at <= now
-        except Exception:
+            mtime_ns = os.stat(lock_path).st_mtime_ns
+        except FileNotFoundError:
+            return True
+        # Only "still held" answers are served from the cache: a lock file
+        # recreated within the mtime granularity must not look expired.
+        cached = self._expiry_cache.get(lock_path.name)
+        if cached is not None and cached[0] == mtime_ns and cached[1] > now_ns:
             return False
-
-    def _write_temp_lock(self, lease: Lease) -> Path:
-        fd, raw_path = tempfile.mkstemp(prefix=".locktmp_", suffix=".json", dir=str(self.lock_dir))
         try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                json.dump(lease.to_dict(), f)
-                f.flush()
-                os.fsync(f.fileno())
-            return Path(raw_path)
-        except Exception:
+            data = lock_path.read_bytes()
+        except FileNotFoundError:
+            return True
+        expires_ns = _lease_expires_ns(data)
+        if expires_ns is None:
+            return now_ns - mtime_ns > _PARTIAL_LOCK_GRACE_NS
+        if len(self._expiry_cache) >= _EXPIRY_CACHE_LIMIT:
+            self._expiry_cache.clear()
+        self._expiry_cache[lock_path.name] = (mtime_ns, expires_ns)
+        return expires_ns <= now_ns
+
+
+# Leases held as flock(2) locks on the lock file. The kernel drops them when
+# the holder exits, so crashed workers free their tasks at once. JSON lease
+# files carry no flock, so every process on a workspace must use the same kind.
+class FlockLeaseManager:
+    def __init__(self, lock_dir: Path):
+        if fcntl is None:
+            raise RuntimeError("FlockLeaseManager requires fcntl (POSIX only)")
+        self.lock_dir = lock_dir
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._held: dict[str, int] = {}
+
+    def _lock_path(self, task_id: str) -> Path:
+        return self.lock_dir / f"{task_id}.lock"
+
+    def try_acquire(self, *, task_id: str, worker_name: str, owner: str, lease_seconds: int) -> Lease | None:
+        lock_path = self._lock_path(task_id)
+        for _ in range(_MAX_ACQUIRE_ATTEMPTS):
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
             try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                header = os.pread(fd, _LEASE_HEADER.size, 0)
+                expired = len(header) == _LEASE_HEADER.size and _LEASE_HEADER.unpack(header)[1] <= time.time_ns()
+                # An overdue holder keeps its lock on the old inode; unlinking
+                # the path lets the next open create a fresh, unlocked file.
+                if expired and self._same_file(fd, lock_path):
+                    lock_path.unlink(missing_ok=True)
                 os.close(fd)
-            except Exception:
-                pass
-            Path(raw_path).unlink(missing_ok=True)
-            raise
+                if expired:
+                    continue
+                return None
+            if not self._same_file(fd, lock_path):
+                os.close(fd)
+                continue
+            now_ns = time.time_ns()
+            expires_ns = now_ns + max(1, lease_seconds) * 1_000_000_000
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, _LEASE_HEADER.pack(now_ns, expires_ns), 0)
+            stale = self._held.pop(task_id, None)
+            if stale is not None:
+                os.close(stale)
+            self._held[task_id] = fd
+            return Lease(
+                task_id,
+                worker_name,
+                owner,
+                _ns_to_datetime(now_ns),
+                _ns_to_datetime(expires_ns),
+            )
+        return None
+
+    def release(self, task_id: str) -> None:
+        fd = self._held.pop(task_id, None)
+        if fd is None:
+            return
+        lock_path = self._lock_path(task_id)
+        try:
+            if self._same_file(fd, lock_path):
+                lock_path.unlink(missing_ok=True)
+        finally:
+            os.close(fd)
+
+    def break_lease(self, task_id: str) -> None:
+        self.release(task_id)
+        self._lock_path(task_id).unlink(missing_ok=True)
+
+    @staticmethod
+    def _same_file(fd: int, path: Path) -> bool:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        fst = os.fstat(fd)
+        return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import concurrent.futures
+import functools
+import os
 import socket
 import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from typing import Protocol
-from uuid import uuid4
 
 from .backends import QueueBackend
-from .types import Result, RunRecord, Task
+from .types import Result, RunRecord, Task, utc_now_iso
+
+
+@functools.lru_cache(maxsize=1)
+def _hostname() -> str:
+    return socket.gethostname()
 
 
 class Worker(Protocol):
@@ -27,6 +32,7 @@ class RunnerConfig:
     lease_seconds: int = 120
     once: bool = False
     poll_interval_seconds: float = 0.5
+    max_poll_interval_seconds: float | None = None
 
 
 class WorkerRunner:
@@ -34,18 +40,45 @@ class WorkerRunner:
         self.queue = queue
         self.worker = worker
         self.config = config or RunnerConfig()
-        self.owner = f"{socket.gethostname()}:{uuid4().hex[:8]}"
+        self.owner = f"{_hostname()}:{os.urandom(4).hex()}"
+        self._pool: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> WorkerRunner:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
 
     def run(self) -> int:
+        try:
+            return self._run()
+        finally:
+            flush = getattr(self.queue, "flush", None)
+            if flush is not None:
+                flush()
+
+    def _run(self) -> int:
         if self.config.once:
             return self._run_batch()
 
         processed = 0
+        poll_interval = self.config.poll_interval_seconds
         while True:
             start = time.monotonic()
-            processed += self._run_batch()
+            batch = self._run_batch()
+            processed += batch
             if self.config.every_seconds is None:
-                time.sleep(self.config.poll_interval_seconds)
+                # Idle queues back off exponentially; any work resets the interval.
+                if batch:
+                    poll_interval = self.config.poll_interval_seconds
+                time.sleep(poll_interval)
+                if self.config.max_poll_interval_seconds is not None:
+                    poll_interval = min(poll_interval * 2, self.config.max_poll_interval_seconds)
                 continue
             elapsed = time.monotonic() - start
             sleep_for = max(0.0, self.config.every_seconds - elapsed)
@@ -56,34 +89,68 @@ class WorkerRunner:
         target = self.config.max_tasks or 1
         processed = 0
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.config.parallel)) as pool:
-            futures = []
-            for _ in range(target):
+        if self.config.parallel <= 1:
+            while processed < target:
                 leased = self.queue.lease_next_task(owner=self.owner, lease_seconds=self.config.lease_seconds)
                 if leased is None:
                     break
                 task, path = leased
-                futures.append(pool.submit(self._process_one, task, path))
-
-            for future in concurrent.futures.as_completed(futures):
+                self._process_one(task, path)
                 processed += 1
-                future.result()
+            return processed
+
+        leased = self._lease_batch(target)
+        # A lone task gains nothing from the pool, so it runs on this thread.
+        if len(leased) <= 1:
+            for task, path in leased:
+                self._process_one(task, path)
+            return len(leased)
+
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.config.parallel,
+                thread_name_prefix=f"metaspn-{self.worker.name}",
+            )
+        futures = [self._pool.submit(self._process_one, task, path) for task, path in leased]
+
+        concurrent.futures.wait(futures)
+        for future in futures:
+            processed += 1
+            future.result()
 
         return processed
 
+    def _lease_batch(self, n: int) -> list:
+        lease_many = getattr(self.queue, "lease_next_tasks", None)
+        if lease_many is not None:
+            return lease_many(owner=self.owner, lease_seconds=self.config.lease_seconds, n=n)
+        leased = []
+        while len(leased) < n:
+            item = self.queue.lease_next_task(owner=self.owner, lease_seconds=self.config.lease_seconds)
+            if item is None:
+                break
+            leased.append(item)
+        return leased
+
     def _process_one(self, task: Task, path):
-        started = datetime.now(timezone.utc)
-        error = None
-        status = "ok"
+        started_at = utc_now_iso()
+        started_ns = time.monotonic_ns()
         try:
             result = self.worker.handle(task)
             if result.task_id != task.task_id:
                 result.task_id = task.task_id
-            self.queue.write_result(result)
-            self.queue.ack_task(path)
+            record = self._run_record(task, started_at, started_ns, "ok", None)
+            finalize = getattr(self.queue, "finalize_task", None)
+            if finalize is not None:
+                finalize(path, result, record)
+            else:
+                self.queue.write_result(result)
+                self.queue.ack_task(path)
+                self.queue.write_run_record(record)
+            return
         except Exception as exc:
-            status = "error"
             error = str(exc)
+        try:
             self.queue.fail_task(path, task, error)
             self.queue.write_result(
                 Result(
@@ -95,18 +162,17 @@ class WorkerRunner:
                 )
             )
         finally:
-            finished = datetime.now(timezone.utc)
-            duration_ms = int((finished - started).total_seconds() * 1000)
-            self.queue.write_run_record(
-                RunRecord(
-                    run_id=uuid4().hex,
-                    worker_name=self.worker.name,
-                    task_id=task.task_id,
-                    started_at=started.isoformat(),
-                    finished_at=finished.isoformat(),
-                    duration_ms=duration_ms,
-                    status=status,
-                    error=error,
-                    trace_context=task.trace_context,
-                )
-            )
+            self.queue.write_run_record(self._run_record(task, started_at, started_ns, "error", error))
+
+    def _run_record(self, task: Task, started_at: str, started_ns: int, status: str, error: str | None) -> RunRecord:
+        return RunRecord(
+            run_id=os.urandom(16).hex(),
+            worker_name=self.worker.name,
+            task_id=task.task_id,
+            started_at=started_at,
+            finished_at=utc_now_iso(),
+            duration_ms=(time.monotonic_ns() - started_ns) // 1_000_000,
+            status=status,
+            error=error,
+            trace_context=task.trace_context,
+        )
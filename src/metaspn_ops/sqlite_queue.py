@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import _json
+from .scheduler import TaskScheduler
+from .types import Result, RunRecord, Task
+
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        worker TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        scheduled_for REAL NOT NULL,
+        body BLOB NOT NULL,
+        attempt_count INTEGER NOT NULL,
+        max_attempts INTEGER NOT NULL,
+        state TEXT NOT NULL DEFAULT 'ready',
+        lease_owner TEXT,
+        lease_expires REAL,
+        PRIMARY KEY (worker, task_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (worker, state, scheduled_for, task_id)",
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY,
+        worker TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        body BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS results_worker ON results (worker)",
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        worker TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        body BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS runs_worker ON runs (worker)",
+    """
+    CREATE TABLE IF NOT EXISTS deadletter (
+        worker TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        body BLOB NOT NULL,
+        PRIMARY KEY (worker, task_id)
+    )
+    """,
+)
+
+_INSERT_TASK = """
+    INSERT INTO tasks (worker, task_id, scheduled_for, body, attempt_count, max_attempts, state)
+    VALUES (?, ?, ?, ?, ?, ?, 'ready')
+    ON CONFLICT (worker, task_id) DO UPDATE SET
+        scheduled_for = excluded.scheduled_for,
+        body = excluded.body,
+        attempt_count = excluded.attempt_count,
+        max_attempts = excluded.max_attempts,
+        state = 'ready',
+        lease_owner = NULL,
+        lease_expires = NULL
+"""
+
+# UPDATE ... RETURNING needs SQLite 3.35; older libraries select the rows and
+# update them by rowid inside one BEGIN IMMEDIATE transaction instead.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_LEASE_TASK = """
+    UPDATE tasks SET state = 'leased', lease_owner = ?, lease_expires = ?
+    WHERE rowid IN (
+        SELECT rowid FROM tasks
+        WHERE worker = ? AND scheduled_for <= ?
+          AND (state = 'ready' OR (state = 'leased' AND lease_expires <= ?))
+        ORDER BY scheduled_for, task_id
+        LIMIT ?
+    )
+    RETURNING scheduled_for, task_id, body
+"""
+
+_SELECT_LEASABLE = """
+    SELECT rowid, scheduled_for, task_id, body FROM tasks
+    WHERE worker = ? AND scheduled_for <= ?
+      AND (state = 'ready' OR (state = 'leased' AND lease_expires <= ?))
+    ORDER BY scheduled_for, task_id
+    LIMIT ?
+"""
+
+_RETRY_TASK = """
+    UPDATE tasks SET
+        scheduled_for = ?,
+        body = ?,
+        attempt_count = ?,
+        max_attempts = ?,
+        state = 'ready',
+        lease_owner = NULL,
+        lease_expires = NULL
+    WHERE worker = ? AND task_id = ? AND state = 'leased'
+"""
+
+
+def _epoch(dt: datetime | None) -> float:
+    if dt is None:
+        return time.time()
+    return dt.astimezone(timezone.utc).timestamp()
+
+
+class SQLiteQueue:
+    def __init__(
+        self,
+        *,
+        workspace: str | Path,
+        worker_name: str,
+        scheduler: TaskScheduler | None = None,
+        db_path: str | Path | None = None,
+    ):
+        self.workspace = Path(workspace)
+        self.worker_name = worker_name
+        self.scheduler = scheduler or TaskScheduler()
+        self.db_path = Path(db_path) if db_path is not None else self.workspace / "queue.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+        for pragma in _PRAGMAS:
+            self._conn.execute(pragma)
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._io_lock = threading.RLock()
+        # task_id -> (lease_owner, lease_expires) for leases handed out here.
+        # Acks and failures only touch the row while it still holds that
+        # lease, so a copy re-enqueued in the meantime is left alone.
+        self._leases: dict[str, tuple[str, float]] = {}
+
+    def close(self) -> None:
+        with self._io_lock:
+            self._conn.close()
+
+    def enqueue_task(self, task: Task, *, scheduled_for: datetime | None = None) -> str:
+        with self._io_lock:
+            self._conn.execute(_INSERT_TASK, self._task_row(task, _epoch(scheduled_for)))
+        return task.task_id
+
+    def enqueue_tasks(self, tasks: Iterable[Task], *, scheduled_for: datetime | None = None) -> list[str]:
+        scheduled = _epoch(scheduled_for)
+        rows = [self._task_row(task, scheduled) for task in tasks]
+        with self._io_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(_INSERT_TASK, rows)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return [row[1] for row in rows]
+
+    def lease_next_task(self, *, owner: str, lease_seconds: int) -> tuple[Task, str] | None:
+        leased = self.lease_next_tasks(owner=owner, lease_seconds=lease_seconds, n=1)
+        return leased[0] if leased else None
+
+    def lease_next_tasks(self, *, owner: str, lease_seconds: int, n: int) -> list[tuple[Task, str]]:
+        now = time.time()
+        expires = now + max(1, lease_seconds)
+        with self._io_lock:
+            if _HAS_RETURNING:
+                rows = self._conn.execute(_LEASE_TASK, (owner, expires, self.worker_name, now, now, n)).fetchall()
+            else:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    selected = self._conn.execute(_SELECT_LEASABLE, (self.worker_name, now, now, n)).fetchall()
+                    self._conn.executemany(
+                        "UPDATE tasks SET state = 'leased', lease_owner = ?, lease_expires = ? WHERE rowid = ?",
+                        [(owner, expires, row[0]) for row in selected],
+                    )
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                rows = [row[1:] for row in selected]
+            for _, task_id, _ in rows:
+                self._leases[task_id] = (owner, expires)
+        # RETURNING order is unspecified, so restore the schedule order.
+        rows.sort()
+        return [(Task.from_dict(_json.loads(body)), task_id) for _, task_id, body in rows]
+
+    def ack_task(self, leased_path: str) -> None:
+        with self._io_lock:
+            self._delete_leased(leased_path)
+
+    def _delete_leased(self, leased_path: str) -> None:
+        query = "DELETE FROM tasks WHERE worker = ? AND task_id = ? AND state = 'leased'"
+        self._conn.execute(*self._with_lease(query, (self.worker_name, leased_path), leased_path))
+
+    def _with_lease(self, query: str, params: tuple, leased_path: str) -> tuple[str, tuple]:
+        # Narrows a statement on a leased row to the lease handed out here;
+        # handles from elsewhere fall back to any current lease.
+        lease = self._leases.pop(leased_path, None)
+        if lease is None:
+            return query, params
+        return query + " AND lease_owner = ? AND lease_expires = ?", params + lease
+
+    def fail_task(self, leased_path: str, task: Task, error: str) -> None:
+        task.attempt_count += 1
+        can_retry = task.attempt_count < task.max_attempts
+        with self._io_lock:
+            if can_retry:
+                retry_at = self.scheduler.next_retry_at(attempt_count=task.attempt_count)
+                row = self._task_row(task, _epoch(retry_at))
+                self._conn.execute(*self._with_lease(_RETRY_TASK, row[2:] + row[:2], leased_path))
+                return
+            body = {
+                "task": task.to_dict(),
+                "final_error": error,
+                "deadlettered_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_leased(leased_path)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO deadletter (worker, task_id, created_at, body) VALUES (?, ?, ?, ?)",
+                    (self.worker_name, task.task_id, time.time(), _json.dumps(body)),
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def write_result(self, result: Result) -> int:
+        with self._io_lock:
+            cur = self._conn.execute(
+                "INSERT INTO results (worker, task_id, created_at, body) VALUES (?, ?, ?, ?)",
+                (self.worker_name, result.task_id, time.time(), result.to_json_bytes()),
+            )
+        return int(cur.lastrowid)
+
+    def write_run_record(self, record: RunRecord) -> int:
+        with self._io_lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (worker, task_id, created_at, body) VALUES (?, ?, ?, ?)",
+                (self.worker_name, record.task_id, time.time(), record.to_json_bytes()),
+            )
+        return int(cur.lastrowid)
+
+    def finalize_task(self, leased_path: str, result: Result, record: RunRecord) -> None:
+        now = time.time()
+        with self._io_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO results (worker, task_id, created_at, body) VALUES (?, ?, ?, ?)",
+                    (self.worker_name, result.task_id, now, result.to_json_bytes()),
+                )
+                self._conn.execute(
+                    "INSERT INTO runs (worker, task_id, created_at, body) VALUES (?, ?, ?, ?)",
+                    (self.worker_name, record.task_id, now, record.to_json_bytes()),
+                )
+                self._delete_leased(leased_path)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def flush(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        now = time.time()
+        with self._io_lock:
+            inbox, locks = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(state = 'leased' AND lease_expires > ?), 0) FROM tasks WHERE worker = ?",
+                (now, self.worker_name),
+            ).fetchone()
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE worker = ?", (self.worker_name,)).fetchone()[0]
+                for table in ("results", "runs", "deadletter")
+            }
+        return {
+            "inbox": int(inbox),
+            "outbox": int(counts["results"]),
+            "runs": int(counts["runs"]),
+            "deadletter": int(counts["deadletter"]),
+            "locks": int(locks),
+        }
+
+    def deadletter_items(self) -> list[str]:
+        with self._io_lock:
+            rows = self._conn.execute(
+                "SELECT task_id FROM deadletter WHERE worker = ? ORDER BY created_at, task_id",
+                (self.worker_name,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def retry_deadletter(self, *, task_id: str | None = None) -> int:
+        query = "SELECT task_id, body FROM deadletter WHERE worker = ?"
+        params: tuple[str, ...] = (self.worker_name,)
+        if task_id:
+            query += " AND task_id = ?"
+            params += (task_id,)
+        now = time.time()
+        with self._io_lock:
+            # Re-enqueueing and clearing the deadletter rows commit together.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dead = self._conn.execute(query, params).fetchall()
+                rows = []
+                for _, body in dead:
+                    task = Task.from_dict(_json.loads(body)["task"])
+                    task.attempt_count = 0
+                    rows.append(self._task_row(task, now))
+                self._conn.executemany(_INSERT_TASK, rows)
+                self._conn.executemany(
+                    "DELETE FROM deadletter WHERE worker = ? AND task_id = ?",
+                    [(self.worker_name, dead_id) for dead_id, _ in dead],
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(dead)
+
+    def _task_row(self, task: Task, scheduled_for: float) -> tuple:
+        return (
+            self.worker_name,
+            task.task_id,
+            scheduled_for,
+            task.to_json_bytes(),
+            task.attempt_count,
+            task.max_attempts,
+        )
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any
 
+from . import _json
+
 
 UTC = timezone.utc
 
@@ -12,6 +15,23 @@ def utc_now() -> datetime:
     return datetime.now(tz=UTC)
 
 
+_iso_second: tuple[int, str] = (-1, "")
+
+
+def utc_now_iso() -> str:
+    # Same text as utc_now().isoformat(); the seconds prefix is formatted once
+    # per second since timestamps are taken several times per task.
+    global _iso_second
+    seconds, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_seconds, prefix = _iso_second
+    if cached_seconds != seconds:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _iso_second = (seconds, prefix)
+    if micros:
+        return f"{prefix}.{micros:06d}+00:00"
+    return f"{prefix}+00:00"
+
+
 @dataclass(slots=True)
 class Task:
     task_id: str
@@ -20,7 +40,7 @@ class Task:
     trace_context: dict[str, Any] = field(default_factory=dict)
     attempt_count: int = 0
     max_attempts: int = 3
-    created_at: str = field(default_factory=lambda: utc_now().isoformat())
+    created_at: str = field(default_factory=utc_now_iso)
 
     @classmethod
     def from_dict(cls, raw: dict[str, Any]) -> "Task":
@@ -31,7 +51,7 @@ class Task:
             trace_context=dict(raw.get("trace_context", {})),
             attempt_count=int(raw.get("attempt_count", 0)),
             max_attempts=int(raw.get("max_attempts", 3)),
-            created_at=str(raw.get("created_at", utc_now().isoformat())),
+            created_at=str(raw["created_at"] if "created_at" in raw else utc_now_iso()),
         )
 
     def to_dict(self) -> dict[str, Any]:
@@ -45,6 +65,9 @@ class Task:
             "created_at": self.created_at,
         }
 
+    def to_json_bytes(self) -> bytes:
+        return _json.dumps(self.to_dict())
+
 
 @dataclass(slots=True)
 class Result:
@@ -53,7 +76,7 @@ class Result:
     payload: dict[str, Any] = field(default_factory=dict)
     error: str | None = None
     trace_context: dict[str, Any] = field(default_factory=dict)
-    produced_at: str = field(default_factory=lambda: utc_now().isoformat())
+    produced_at: str = field(default_factory=utc_now_iso)
 
     @classmethod
     def from_dict(cls, raw: dict[str, Any]) -> "Result":
@@ -63,7 +86,7 @@ class Result:
             payload=dict(raw.get("payload", {})),
             error=raw.get("error"),
             trace_context=dict(raw.get("trace_context", {})),
-            produced_at=str(raw.get("produced_at", utc_now().isoformat())),
+            produced_at=str(raw["produced_at"] if "produced_at" in raw else utc_now_iso()),
         )
 
     def to_dict(self) -> dict[str, Any]:
@@ -76,6 +99,9 @@ class Result:
             "produced_at": self.produced_at,
         }
 
+    def to_json_bytes(self) -> bytes:
+        return _json.dumps(self.to_dict())
+
 
 @dataclass(slots=True)
 class RunRecord:
@@ -101,3 +127,6 @@ class RunRecord:
             "error": self.error,
             "trace_context": self.trace_context,
         }
+
+    def to_json_bytes(self) -> bytes:
+        return _json.dumps(self.to_dict())
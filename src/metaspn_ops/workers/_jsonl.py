@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from .. import _json
+from ..fs_queue import _fsync_dir
+
+
+@lru_cache(maxsize=None)
+def store_dir_for(workspace: Path) -> Path:
+    # Every store of a workspace shares store/, so it is created once per
+    # process rather than on each store construction.
+    store_dir = workspace / "store"
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return store_dir
+
+
+# Per-file caches keep at most this many paths; the least recently used one is
+# dropped and simply reloaded from disk if it is needed again.
+_CACHED_PATHS = 64
+
+
+class _PathCache(OrderedDict):
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+            self.move_to_end(key)
+        except KeyError:
+            return default
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > _CACHED_PATHS:
+            self.popitem(last=False)
+
+
+# path -> (st_ino, st_mtime_ns, consumed_bytes, ids). Like the row cache below,
+# a grown file only has its new lines decoded; anything else is rescanned.
+_id_cache = _PathCache()
+
+
+_ID_PREFIXES = (b'{"id":"', b'{"id": "')
+
+
+def _line_id(line: bytes) -> str:
+    # Store rows are written with "id" as their first key, so the id can be
+    # sliced out without decoding the rest of the row. Anything else (other
+    # key order, non-string or escaped ids) takes the full parse.
+    for prefix in _ID_PREFIXES:
+        if line.startswith(prefix):
+            start = len(prefix)
+            end = line.find(b'"', start)
+            if end > 0 and b"\\" not in line[start:end]:
+                return line[start:end].decode("utf-8")
+            break
+    return str(_json.loads(line).get("id"))
+
+
+def _scan_lines(path: Path, offset: int, consume: Callable[[bytes], Any]) -> tuple[int, bytes]:
+    # Hands each complete non-blank line after `offset` to `consume` and
+    # returns the offset past the last newline plus any unterminated tail.
+    with path.open("rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        if line.strip():
+            consume(line)
+    return offset + end, data[end:]
+
+
+def known_ids(path: Path) -> tuple[int, set[str]]:
+    _, size, ids = _stat_ids(path)
+    return size, ids
+
+
+def _stat_ids(path: Path) -> tuple[os.stat_result | None, int, set[str]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        _id_cache.pop(path, None)
+        return None, 0, set()
+    cached = _id_cache.get(path)
+    if cached is not None and cached[:3] == (st.st_ino, st.st_mtime_ns, st.st_size):
+        return st, st.st_size, cached[3]
+    with _row_lock:
+        rows = _row_cache.get(path)
+        if rows is not None and rows[:3] == (st.st_ino, st.st_mtime_ns, st.st_size):
+            # Rows already parsed for a reader of the same file.
+            ids = {str(row.get("id")) for row in rows[3]}
+            _id_cache[path] = (st.st_ino, st.st_mtime_ns, st.st_size, ids)
+            return st, st.st_size, ids
+    offset, ids = 0, set()
+    if cached is not None and cached[0] == st.st_ino and st.st_size > cached[2]:
+        offset, ids = cached[2], cached[3]
+    end, tail = _scan_lines(path, offset, lambda line: ids.add(_line_id(line)))
+    if tail.strip():
+        # An unterminated last line still holds its row's id; appending that
+        # id again would only duplicate it.
+        with contextlib.suppress(ValueError):
+            ids.add(_line_id(tail))
+    _id_cache[path] = (st.st_ino, st.st_mtime_ns, end, ids)
+    return st, end, ids
+
+
+def append_if_absent(
+    path: Path,
+    rec_id: str,
+    payload: dict[str, Any],
+    *,
+    fds: dict[Path, tuple[int, int]] | None = None,
+    durable: bool = False,
+) -> bool:
+    return append_many(path, [(rec_id, payload)], fds=fds, durable=durable)[0]
+
+
+def append_many(
+    path: Path,
+    records: Iterable[tuple[str, dict[str, Any]]],
+    *,
+    fds: dict[Path, tuple[int, int]] | None = None,
+    durable: bool = False,
+) -> list[bool]:
+    # New rows go out in one write; ids repeated within the batch count as
+    # duplicates just like ids already in the file. With `fds` the append
+    # descriptor is kept open there between calls; `durable` fsyncs the
+    # batch, and the directory too when the write created the file.
+    st, consumed, ids = _stat_ids(path)
+    size = st.st_size if st is not None else 0
+    written: list[bool] = []
+    lines: list[bytes] = []
+    fresh: set[str] = set()
+    for rec_id, payload in records:
+        if rec_id in ids or rec_id in fresh:
+            written.append(False)
+            continue
+        fresh.add(rec_id)
+        lines.append(_json.dumps(payload) + b"\n")
+        written.append(True)
+    if not lines:
+        return written
+    data = b"".join(lines)
+    if consumed < size:
+        # The file ends mid-line; start the batch on a line of its own.
+        data = b"\n" + data
+    if fds is None:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            _write_all(fd, data)
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+    else:
+        fd = _append_fd(fds, path, st)
+        _write_all(fd, data)
+        if durable:
+            os.fsync(fd)
+    if durable and st is None:
+        _fsync_dir(path.parent)
+    ids.update(fresh)
+    st = path.stat()
+    if st.st_size == size + len(data):
+        _id_cache[path] = (st.st_ino, st.st_mtime_ns, st.st_size, ids)
+    else:
+        _id_cache.pop(path, None)
+    return written
+
+
+_fd_lock = threading.Lock()
+
+
+def _append_fd(fds: dict[Path, tuple[int, int]], path: Path, st: os.stat_result | None) -> int:
+    # Entries are (fd, st_ino); a descriptor whose file was removed or
+    # replaced since it was opened is dropped so rows reach the current file.
+    with _fd_lock:
+        entry = fds.get(path)
+        if entry is not None:
+            if st is not None and entry[1] == st.st_ino:
+                return entry[0]
+            del fds[path]
+            os.close(entry[0])
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        fds[path] = (fd, os.fstat(fd).st_ino)
+        return fd
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def close_fds(fds: dict[Path, tuple[int, int]]) -> None:
+    with _fd_lock:
+        while fds:
+            os.close(fds.popitem()[1][0])
+
+
+# path -> (st_ino, st_mtime_ns, consumed_bytes, rows). Store files are
+# append-only, so a grown file is read from the consumed offset; a shrunk one,
+# or one replaced by a new file (another inode), is read again from the start.
+# A file rewritten in place to a larger size still looks grown.
+_row_cache = _PathCache()
+_row_lock = threading.Lock()
+
+
+def _load_rows(path: Path) -> tuple[list[dict[str, Any]], int, bytes]:
+    with _row_lock:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            _row_cache.pop(path, None)
+            return [], 0, b""
+        offset, rows = 0, []
+        cached = _row_cache.get(path)
+        if cached is not None and cached[0] == st.st_ino:
+            if st.st_size == cached[2]:
+                if st.st_mtime_ns == cached[1]:
+                    return cached[3], len(cached[3]), b""
+            elif st.st_size > cached[2]:
+                offset, rows = cached[2], cached[3]
+        loads = _json.loads
+        end, tail = _scan_lines(path, offset, lambda line: rows.append(loads(line)))
+        _row_cache[path] = (st.st_ino, st.st_mtime_ns, end, rows)
+        return rows, len(rows), tail
+
+
+def iter_rows(path: Path) -> Iterator[dict[str, Any]]:
+    # Cached lists only grow in place, so their first `count` rows stay valid
+    # while other readers refresh the cache. The rows themselves are shared;
+    # store getters pass them through copy_rows before returning them.
+    rows, count, tail = _load_rows(path)
+    yield from islice(rows, count)
+    # An unterminated last line is yielded but not consumed, so the rest of
+    # it is picked up once its writer finishes.
+    if tail.strip():
+        yield _json.loads(tail)
+
+
+def read_rows(path: Path) -> list[dict[str, Any]]:
+    return list(iter_rows(path))
+
+
+def copy_row(value: Any) -> Any:
+    # Cached rows are shared by every reader in the process, so rows handed
+    # out by store getters are copied, nested dicts and lists included.
+    if type(value) is dict:
+        return {k: copy_row(v) for k, v in value.items()}
+    if type(value) is list:
+        return [copy_row(v) for v in value]
+    return value
+
+
+def copy_rows(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [copy_row(row) for row in rows]
+
+
+# path -> (cached rows list, rows indexed, id -> row). The index follows the
+# row cache: it is extended while the cached list is the same object and
+# rebuilt once the file was reread from the start.
+_row_index = _PathCache()
+
+
+def find_row(path: Path, rec_id: str) -> dict[str, Any] | None:
+    rows, count, tail = _load_rows(path)
+    cached, indexed, index = _row_index.get(path, (None, 0, {}))
+    if cached is not rows:
+        indexed, index = 0, {}
+    for row in islice(rows, indexed, count):
+        # The first row with an id wins, as in a front-to-back scan.
+        index.setdefault(str(row.get("id")), row)
+    _row_index[path] = (rows, count, index)
+    row = index.get(rec_id)
+    if row is not None:
+        return copy_row(row)
+    if tail.strip():
+        tail_row = _json.loads(tail)
+        if str(tail_row.get("id")) == rec_id:
+            return tail_row
+    return None
+
+
+# (path, field) -> (cached rows list, rows grouped, value -> rows), kept in
+# step with the row cache the same way as _row_index.
+_group_index = _PathCache()
+
+
+def rows_where(path: Path, field: str, value: str) -> list[dict[str, Any]]:
+    # Rows whose str(row.get(field)) equals value, in file order.
+    rows, count, tail = _load_rows(path)
+    key = (path, field)
+    cached, grouped, groups = _group_index.get(key, (None, 0, {}))
+    if cached is not rows:
+        grouped, groups = 0, {}
+    for row in islice(rows, grouped, count):
+        groups.setdefault(str(row.get(field)), []).append(row)
+    _group_index[key] = (rows, count, groups)
+    out = list(groups.get(value, ()))
+    if tail.strip():
+        tail_row = _json.loads(tail)
+        if str(tail_row.get(field)) == value:
+            out.append(tail_row)
+    return out
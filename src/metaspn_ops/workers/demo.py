@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import json
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from ..backends import QueueBackend
 from ..fs_queue import FilesystemQueue
+from ..inproc_queue import InProcQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Task
+from ._jsonl import append_if_absent
 from .m1 import M1JsonlStore, ProfilerWorker, RouterWorker, ScorerWorker
 from .m2 import DigestWorker, DrafterWorker, M2JsonlStore
 
@@ -22,29 +26,6 @@ def _stable_hash(parts: list[str]) -> str:
     return hashlib.sha256(payload).hexdigest()[:24]
 
 
-def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-    if not path.exists():
-        return []
-    rows: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                rows.append(json.loads(line))
-    return rows
-
-
-def _append_if_absent(path: Path, payload: dict[str, Any]) -> bool:
-    rec_id = str(payload.get("id"))
-    if rec_id:
-        for row in _read_jsonl(path):
-            if str(row.get("id")) == rec_id:
-                return False
-    with path.open("a", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=True)
-        f.write("\n")
-    return True
-
-
 def seed_resolved_entities(*, workspace: str | Path, resolved_entities_jsonl: str | Path) -> dict[str, int]:
     workspace = Path(workspace)
     source_path = Path(resolved_entities_jsonl)
@@ -69,7 +50,7 @@ def seed_resolved_entities(*, workspace: str | Path, resolved_entities_jsonl: st
                 "occurred_at": occurred_at,
                 "source": str(row.get("source", "demo.seed")),
             }
-            if _append_if_absent(emissions_path, emission):
+            if append_if_absent(emissions_path, emission_id, emission):
                 inserted += 1
             else:
                 duplicates += 1
@@ -101,7 +82,7 @@ def ingest_manual_outcomes(*, workspace: str | Path, outcomes_jsonl: str | Path)
                 "outcome": str(row.get("outcome", "manual_outcome")),
                 "source": str(row.get("source", "demo.manual_outcome")),
             }
-            if _append_if_absent(outcomes_path, outcome):
+            if append_if_absent(outcomes_path, outcome_id, outcome):
                 inserted += 1
             else:
                 duplicates += 1
@@ -119,100 +100,118 @@ def run_demo_once(
     max_attempts: int = 1,
     resolved_entities_jsonl: str | Path | None = None,
     outcomes_jsonl: str | Path | None = None,
+    persist: bool = False,
 ) -> dict[str, Any]:
     workspace = Path(workspace)
 
+    # Demo tasks are enqueued and run in this process, so by default they are
+    # handed over in memory; persist=True keeps the on-disk queue folders.
+    def open_queue(worker_name: str) -> QueueBackend:
+        if persist:
+            return FilesystemQueue(workspace=workspace, worker_name=worker_name)
+        return InProcQueue(worker_name=worker_name)
+
     seeded = {"inserted": 0, "duplicates": 0}
     if resolved_entities_jsonl is not None:
         seeded = seed_resolved_entities(workspace=workspace, resolved_entities_jsonl=resolved_entities_jsonl)
 
     m1_store = M1JsonlStore(workspace)
     m2_store = M2JsonlStore(workspace)
-
-    profiler = ProfilerWorker(store=m1_store)
-    scorer = ScorerWorker(store=m1_store)
-    router = RouterWorker(store=m1_store)
-    digest = DigestWorker(store=m2_store)
-
-    q_profile = FilesystemQueue(workspace=workspace, worker_name=profiler.name)
-    q_score = FilesystemQueue(workspace=workspace, worker_name=scorer.name)
-    q_router = FilesystemQueue(workspace=workspace, worker_name=router.name)
-    q_digest = FilesystemQueue(workspace=workspace, worker_name=digest.name)
-
-    q_profile.enqueue_task(
-        Task(
-            task_id=f"demo_profile_{_stable_hash([window_key, str(limit)])}",
-            task_type="profile_entity",
-            payload={"limit": limit},
-            max_attempts=max_attempts,
-        )
-    )
-    profile_processed = WorkerRunner(queue=q_profile, worker=profiler, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    q_score.enqueue_task(
-        Task(
-            task_id=f"demo_score_{_stable_hash([window_key, str(limit)])}",
-            task_type="score_entity",
-            payload={"limit": limit},
-            max_attempts=max_attempts,
+    try:
+        profiler = ProfilerWorker(store=m1_store)
+        scorer = ScorerWorker(store=m1_store)
+        router = RouterWorker(store=m1_store)
+        digest = DigestWorker(store=m2_store)
+
+        q_profile = open_queue(profiler.name)
+        q_score = open_queue(scorer.name)
+        q_router = open_queue(router.name)
+        q_digest = open_queue(digest.name)
+
+        # Manual outcomes only feed M3, so their ingestion overlaps the M1/M2
+        # stages below, which must stay in order (each reads the previous rows).
+        outcomes_future: concurrent.futures.Future | None = None
+        if outcomes_jsonl is not None:
+            outcomes_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            outcomes_future = outcomes_pool.submit(ingest_manual_outcomes, workspace=workspace, outcomes_jsonl=outcomes_jsonl)
+            outcomes_pool.shutdown(wait=False)
+
+        q_profile.enqueue_task(
+            Task(
+                task_id=f"demo_profile_{_stable_hash([window_key, str(limit)])}",
+                task_type="profile_entity",
+                payload={"limit": limit},
+                max_attempts=max_attempts,
+            )
         )
-    )
-    score_processed = WorkerRunner(queue=q_score, worker=scorer, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    q_router.enqueue_task(
-        Task(
-            task_id=f"demo_route_{_stable_hash([window_key, str(limit)])}",
-            task_type="route_entity",
-            payload={"limit": limit},
-            max_attempts=max_attempts,
+        profile_processed = WorkerRunner(queue=q_profile, worker=profiler, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        q_score.enqueue_task(
+            Task(
+                task_id=f"demo_score_{_stable_hash([window_key, str(limit)])}",
+                task_type="score_entity",
+                payload={"limit": limit},
+                max_attempts=max_attempts,
+            )
         )
-    )
-    route_processed = WorkerRunner(queue=q_router, worker=router, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    q_digest.enqueue_task(
-        Task(
-            task_id=f"demo_digest_{_stable_hash([window_key, str(top_n)])}",
-            task_type="digest_recommendations",
-            payload={"window_key": window_key, "top_n": top_n},
-            max_attempts=max_attempts,
+        score_processed = WorkerRunner(queue=q_score, worker=scorer, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        q_router.enqueue_task(
+            Task(
+                task_id=f"demo_route_{_stable_hash([window_key, str(limit)])}",
+                task_type="route_entity",
+                payload={"limit": limit},
+                max_attempts=max_attempts,
+            )
         )
-    )
-    digest_processed = WorkerRunner(queue=q_digest, worker=digest, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    draft_processed = 0
-    if channel is not None:
-        drafter = DrafterWorker(store=m2_store)
-        q_draft = FilesystemQueue(workspace=workspace, worker_name=drafter.name)
-        latest_digest = m2_store.latest_digest()
-        digest_id = latest_digest.get("id") if latest_digest else None
-        q_draft.enqueue_task(
+        route_processed = WorkerRunner(queue=q_router, worker=router, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        q_digest.enqueue_task(
             Task(
-                task_id=f"demo_draft_{_stable_hash([window_key, str(top_n), channel])}",
-                task_type="draft_outreach",
-                payload={"digest_id": digest_id, "channel": channel},
+                task_id=f"demo_digest_{_stable_hash([window_key, str(top_n)])}",
+                task_type="digest_recommendations",
+                payload={"window_key": window_key, "top_n": top_n},
                 max_attempts=max_attempts,
             )
         )
-        draft_processed = WorkerRunner(queue=q_draft, worker=drafter, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    outcomes = {"inserted": 0, "duplicates": 0}
-    if outcomes_jsonl is not None:
-        outcomes = ingest_manual_outcomes(workspace=workspace, outcomes_jsonl=outcomes_jsonl)
-
-    return {
-        "workspace": str(workspace),
-        "window_key": window_key,
-        "profile_processed": profile_processed,
-        "score_processed": score_processed,
-        "route_processed": route_processed,
-        "digest_processed": digest_processed,
-        "draft_processed": draft_processed,
-        "seeded_resolved_entities": seeded,
-        "manual_outcomes": outcomes,
-        "profiles_path": str(m1_store.profiles_path),
-        "scores_path": str(m1_store.scores_path),
-        "routes_path": str(m1_store.routes_path),
-        "digests_path": str(m2_store.digests_path),
-        "drafts_path": str(m2_store.drafts_path),
-        "m3_outcomes_path": str(workspace / "store" / "m3_outcomes.jsonl"),
-    }
+        digest_processed = WorkerRunner(queue=q_digest, worker=digest, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        draft_processed = 0
+        if channel is not None:
+            drafter = DrafterWorker(store=m2_store)
+            q_draft = open_queue(drafter.name)
+            latest_digest = m2_store.latest_digest()
+            digest_id = latest_digest.get("id") if latest_digest else None
+            q_draft.enqueue_task(
+                Task(
+                    task_id=f"demo_draft_{_stable_hash([window_key, str(top_n), channel])}",
+                    task_type="draft_outreach",
+                    payload={"digest_id": digest_id, "channel": channel},
+                    max_attempts=max_attempts,
+                )
+            )
+            draft_processed = WorkerRunner(queue=q_draft, worker=drafter, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        outcomes = {"inserted": 0, "duplicates": 0}
+        if outcomes_future is not None:
+            outcomes = outcomes_future.result()
+
+        return {
+            "workspace": str(workspace),
+            "window_key": window_key,
+            "profile_processed": profile_processed,
+            "score_processed": score_processed,
+            "route_processed": route_processed,
+            "digest_processed": digest_processed,
+            "draft_processed": draft_processed,
+            "seeded_resolved_entities": seeded,
+            "manual_outcomes": outcomes,
+            "profiles_path": str(m1_store.profiles_path),
+            "scores_path": str(m1_store.scores_path),
+            "routes_path": str(m1_store.routes_path),
+            "digests_path": str(m2_store.digests_path),
+            "drafts_path": str(m2_store.drafts_path),
+            "m3_outcomes_path": str(workspace / "store" / "m3_outcomes.jsonl"),
+        }
+    finally:
+        m2_store.close()
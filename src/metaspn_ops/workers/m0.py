@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import hashlib
-import json
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 from typing import Any, Protocol
 
+from .. import _json
 from ..fs_queue import FilesystemQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Result, Task
+from ._jsonl import append_if_absent, append_many, copy_rows, iter_rows, store_dir_for
 
 
 def _utc_now_iso() -> str:
@@ -46,71 +49,36 @@ class JsonlStoreAdapter:
 
     def __init__(self, workspace: str | Path):
         self.workspace = Path(workspace)
-        self.store_dir = self.workspace / "store"
-        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.store_dir = store_dir_for(self.workspace)
         self.signals_path = self.store_dir / "signals.jsonl"
         self.emissions_path = self.store_dir / "emissions.jsonl"
 
     def write_signal_if_absent(self, signal: dict[str, Any]) -> bool:
-        signal_id = str(signal["id"])
-        if self._id_exists(self.signals_path, signal_id):
-            return False
-        self._append_jsonl(self.signals_path, signal)
-        return True
+        return append_if_absent(self.signals_path, str(signal["id"]), signal)
+
+    def write_signals_if_absent(self, signals: list[dict[str, Any]]) -> list[bool]:
+        return append_many(self.signals_path, [(str(signal["id"]), signal) for signal in signals])
 
     def write_emission_if_absent(self, emission: dict[str, Any]) -> bool:
-        emission_id = str(emission["id"])
-        if self._id_exists(self.emissions_path, emission_id):
-            return False
-        self._append_jsonl(self.emissions_path, emission)
-        return True
+        return append_if_absent(self.emissions_path, str(emission["id"]), emission)
+
+    def write_emissions_if_absent(self, emissions: list[dict[str, Any]]) -> list[bool]:
+        return append_many(self.emissions_path, [(str(emission["id"]), emission) for emission in emissions])
 
     def iter_unresolved_signals(self, *, limit: int | None = None) -> list[dict[str, Any]]:
-        signals = self._read_jsonl(self.signals_path)
         resolved_signal_ids = {
             str(em.get("signal_id"))
-            for em in self._read_jsonl(self.emissions_path)
+            for em in self._iter_jsonl(self.emissions_path)
             if em.get("signal_id") is not None
         }
-
-        unresolved: list[dict[str, Any]] = []
-        for signal in signals:
-            signal_id = str(signal.get("id"))
-            if signal_id in resolved_signal_ids:
-                continue
-            unresolved.append(signal)
-            if limit is not None and len(unresolved) >= limit:
-                break
-        return unresolved
+        unresolved = (
+            signal for signal in self._iter_jsonl(self.signals_path) if str(signal.get("id")) not in resolved_signal_ids
+        )
+        return copy_rows(islice(unresolved, limit))
 
     @staticmethod
-    def _append_jsonl(path: Path, payload: dict[str, Any]) -> None:
-        with path.open("a", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=True)
-            f.write("\n")
-
-    @staticmethod
-    def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-        if not path.exists():
-            return []
-        rows: list[dict[str, Any]] = []
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    rows.append(json.loads(line))
-        return rows
-
-    def _id_exists(self, path: Path, rec_id: str) -> bool:
-        if not path.exists():
-            return False
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                row = json.loads(line)
-                if str(row.get("id")) == rec_id:
-                    return True
-        return False
+    def _iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+        return iter_rows(path)
 
 
 @dataclass(slots=True)
@@ -146,34 +114,40 @@ class IngestSocialWorker:
         max_records = payload.get("max_records")
         max_records = int(max_records) if max_records is not None else None
 
-        ingested = 0
-        duplicates = 0
-        signal_ids: list[str] = []
+        signals: list[dict[str, Any]] = []
+        # Rows from one task share a single timestamp.
+        now_iso = _utc_now_iso()
 
-        with input_path.open("r", encoding="utf-8") as f:
+        with input_path.open("rb") as f:
             for i, line in enumerate(f):
                 if max_records is not None and i >= max_records:
                     break
                 if not line.strip():
                     continue
-                row = json.loads(line)
+                row = _json.loads(line)
                 record_id = str(row.get("record_id") or row.get("id") or i)
-                occurred_at = str(row.get("occurred_at") or _utc_now_iso())
+                occurred_at = str(row.get("occurred_at") or now_iso)
                 signal_id = f"sig_{_stable_hash([source, record_id, occurred_at])}"
-                signal = {
-                    "id": signal_id,
-                    "schema_version": schema_version,
-                    "source": source,
-                    "signal_type": "social.ingested",
-                    "occurred_at": occurred_at,
-                    "payload": row,
-                }
-                wrote = self.store.write_signal_if_absent(signal)
-                if wrote:
-                    ingested += 1
-                else:
-                    duplicates += 1
-                signal_ids.append(signal_id)
+                signals.append(
+                    {
+                        "id": signal_id,
+                        "schema_version": schema_version,
+                        "source": source,
+                        "signal_type": "social.ingested",
+                        "occurred_at": occurred_at,
+                        "payload": row,
+                    }
+                )
+
+        # Stores that can append in bulk write every new signal at once.
+        write_many = getattr(self.store, "write_signals_if_absent", None)
+        if write_many is not None:
+            wrote = write_many(signals)
+        else:
+            wrote = [self.store.write_signal_if_absent(signal) for signal in signals]
+        ingested = sum(wrote)
+        duplicates = len(wrote) - ingested
+        signal_ids = [signal["id"] for signal in signals]
 
         return Result(
             task_id=task.task_id,
@@ -198,12 +172,12 @@ class ResolveEntityWorker:
         limit = int(task.payload.get("limit", 100))
         unresolved = self.store.iter_unresolved_signals(limit=limit)
 
-        emitted = 0
-        duplicates = 0
-        emission_ids: list[str] = []
+        emissions: list[dict[str, Any]] = []
 
+        now_iso = _utc_now_iso()
+        resolve = self.resolver.resolve
         for signal in unresolved:
-            resolution = self.resolver.resolve(signal)
+            resolution = resolve(signal)
             signal_id = str(signal["id"])
             emission_id = f"em_{_stable_hash([signal_id, str(resolution['entity_ref'])])}"
             emission = {
@@ -211,18 +185,22 @@ class ResolveEntityWorker:
                 "schema_version": "v1",
                 "source": "resolve_entity",
                 "emission_type": "entity.resolved",
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
                 "signal_id": signal_id,
                 "entity_ref": resolution["entity_ref"],
                 "confidence": resolution.get("confidence"),
                 "resolver": resolution.get("resolver"),
             }
-            wrote = self.store.write_emission_if_absent(emission)
-            if wrote:
-                emitted += 1
-            else:
-                duplicates += 1
-            emission_ids.append(emission_id)
+            emissions.append(emission)
+
+        write_many = getattr(self.store, "write_emissions_if_absent", None)
+        if write_many is not None:
+            wrote = write_many(emissions)
+        else:
+            wrote = [self.store.write_emission_if_absent(emission) for emission in emissions]
+        emitted = sum(wrote)
+        duplicates = len(wrote) - emitted
+        emission_ids = [emission["id"] for emission in emissions]
 
         return Result(
             task_id=task.task_id,
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import hashlib
-import json
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 from typing import Any
 
 from ..fs_queue import FilesystemQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Result, Task
+from ._jsonl import append_if_absent, append_many, copy_rows, iter_rows, store_dir_for
 
 
 def _utc_now_iso() -> str:
@@ -32,51 +34,30 @@ class M1JsonlStore:
 
     def __init__(self, workspace: str | Path):
         self.workspace = Path(workspace)
-        self.store_dir = self.workspace / "store"
-        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.store_dir = store_dir_for(self.workspace)
         self.emissions_path = self.store_dir / "emissions.jsonl"
         self.profiles_path = self.store_dir / "m1_profiles.jsonl"
         self.scores_path = self.store_dir / "m1_scores.jsonl"
         self.routes_path = self.store_dir / "m1_routes.jsonl"
 
     def unresolved_entities(self, *, limit: int = 100) -> list[str]:
-        resolved = [
-            row for row in self._read_jsonl(self.emissions_path) if row.get("emission_type") == "entity.resolved"
-        ]
-        profiled_entities = {str(row.get("entity_ref")) for row in self._read_jsonl(self.profiles_path)}
-        pending: list[str] = []
-        for row in resolved:
-            ref = str(row.get("entity_ref"))
-            if ref in profiled_entities:
-                continue
-            pending.append(ref)
-            if len(pending) >= limit:
-                break
-        return pending
+        profiled_entities = {str(row.get("entity_ref")) for row in self._iter_jsonl(self.profiles_path)}
+        pending = (
+            str(row.get("entity_ref"))
+            for row in self._iter_jsonl(self.emissions_path)
+            if row.get("emission_type") == "entity.resolved" and str(row.get("entity_ref")) not in profiled_entities
+        )
+        return list(islice(pending, limit))
 
     def unscored_profiles(self, *, limit: int = 100) -> list[dict[str, Any]]:
-        scored_entities = {str(row.get("entity_ref")) for row in self._read_jsonl(self.scores_path)}
-        pending: list[dict[str, Any]] = []
-        for row in self._read_jsonl(self.profiles_path):
-            ref = str(row.get("entity_ref"))
-            if ref in scored_entities:
-                continue
-            pending.append(row)
-            if len(pending) >= limit:
-                break
-        return pending
+        scored_entities = {str(row.get("entity_ref")) for row in self._iter_jsonl(self.scores_path)}
+        pending = (row for row in self._iter_jsonl(self.profiles_path) if str(row.get("entity_ref")) not in scored_entities)
+        return copy_rows(islice(pending, limit))
 
     def unrouted_scores(self, *, limit: int = 100) -> list[dict[str, Any]]:
-        routed_entities = {str(row.get("entity_ref")) for row in self._read_jsonl(self.routes_path)}
-        pending: list[dict[str, Any]] = []
-        for row in self._read_jsonl(self.scores_path):
-            ref = str(row.get("entity_ref"))
-            if ref in routed_entities:
-                continue
-            pending.append(row)
-            if len(pending) >= limit:
-                break
-        return pending
+        routed_entities = {str(row.get("entity_ref")) for row in self._iter_jsonl(self.routes_path)}
+        pending = (row for row in self._iter_jsonl(self.scores_path) if str(row.get("entity_ref")) not in routed_entities)
+        return copy_rows(islice(pending, limit))
 
     def write_profile_if_absent(self, profile: dict[str, Any]) -> bool:
         return self._write_if_absent(self.profiles_path, profile)
@@ -87,41 +68,24 @@ class M1JsonlStore:
     def write_route_if_absent(self, route: dict[str, Any]) -> bool:
         return self._write_if_absent(self.routes_path, route)
 
+    def write_profiles_if_absent(self, profiles: list[dict[str, Any]]) -> list[bool]:
+        return self._write_many_if_absent(self.profiles_path, profiles)
+
+    def write_scores_if_absent(self, scores: list[dict[str, Any]]) -> list[bool]:
+        return self._write_many_if_absent(self.scores_path, scores)
+
+    def write_routes_if_absent(self, routes: list[dict[str, Any]]) -> list[bool]:
+        return self._write_many_if_absent(self.routes_path, routes)
+
     def _write_if_absent(self, path: Path, payload: dict[str, Any]) -> bool:
-        rec_id = str(payload["id"])
-        if self._id_exists(path, rec_id):
-            return False
-        self._append_jsonl(path, payload)
-        return True
+        return append_if_absent(path, str(payload["id"]), payload)
 
-    @staticmethod
-    def _append_jsonl(path: Path, payload: dict[str, Any]) -> None:
-        with path.open("a", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=True)
-            f.write("\n")
+    def _write_many_if_absent(self, path: Path, payloads: list[dict[str, Any]]) -> list[bool]:
+        return append_many(path, [(str(payload["id"]), payload) for payload in payloads])
 
     @staticmethod
-    def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-        if not path.exists():
-            return []
-        rows: list[dict[str, Any]] = []
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    rows.append(json.loads(line))
-        return rows
-
-    def _id_exists(self, path: Path, rec_id: str) -> bool:
-        if not path.exists():
-            return False
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                row = json.loads(line)
-                if str(row.get("id")) == rec_id:
-                    return True
-        return False
+    def _iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+        return iter_rows(path)
 
 
 @dataclass(slots=True)
@@ -132,28 +96,29 @@ class ProfilerWorker:
     def handle(self, task: Task) -> Result:
         limit = int(task.payload.get("limit", 100))
         entities = self.store.unresolved_entities(limit=limit)
-        created = 0
-        duplicates = 0
-        profile_ids: list[str] = []
+        profiles: list[dict[str, Any]] = []
 
+        now_iso = _utc_now_iso()
         for ref in entities:
+            kind, sep, handle = ref.partition(":")
             features = {
-                "is_person": ref.startswith("person:"),
-                "handle_length": len(ref.split(":", 1)[-1]),
+                "is_person": kind == "person" and bool(sep),
+                "handle_length": len(handle) if sep else len(ref),
                 "source": "m1.profiler.v1",
             }
             profile_id = f"profile_{_stable_hash([ref])}"
             profile = {
                 "id": profile_id,
                 "entity_ref": ref,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
                 "features": features,
             }
-            if self.store.write_profile_if_absent(profile):
-                created += 1
-            else:
-                duplicates += 1
-            profile_ids.append(profile_id)
+            profiles.append(profile)
+
+        wrote = self.store.write_profiles_if_absent(profiles)
+        created = sum(wrote)
+        duplicates = len(wrote) - created
+        profile_ids = [row["id"] for row in profiles]
 
         return Result(
             task_id=task.task_id,
@@ -176,10 +141,9 @@ class ScorerWorker:
     def handle(self, task: Task) -> Result:
         limit = int(task.payload.get("limit", 100))
         profiles = self.store.unscored_profiles(limit=limit)
-        scored = 0
-        duplicates = 0
-        score_ids: list[str] = []
+        scores: list[dict[str, Any]] = []
 
+        now_iso = _utc_now_iso()
         for profile in profiles:
             ref = str(profile["entity_ref"])
             features = profile.get("features") or {}
@@ -192,15 +156,16 @@ class ScorerWorker:
             score_row = {
                 "id": score_id,
                 "entity_ref": ref,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
                 "score": round(score, 2),
                 "model": "heuristic.v1",
             }
-            if self.store.write_score_if_absent(score_row):
-                scored += 1
-            else:
-                duplicates += 1
-            score_ids.append(score_id)
+            scores.append(score_row)
+
+        wrote = self.store.write_scores_if_absent(scores)
+        scored = sum(wrote)
+        duplicates = len(wrote) - scored
+        score_ids = [row["id"] for row in scores]
 
         return Result(
             task_id=task.task_id,
@@ -223,10 +188,9 @@ class RouterWorker:
     def handle(self, task: Task) -> Result:
         limit = int(task.payload.get("limit", 100))
         scores = self.store.unrouted_scores(limit=limit)
-        routed = 0
-        duplicates = 0
-        route_ids: list[str] = []
+        routes: list[dict[str, Any]] = []
 
+        now_iso = _utc_now_iso()
         for row in scores:
             ref = str(row["entity_ref"])
             score = float(row.get("score", 0))
@@ -244,16 +208,17 @@ class RouterWorker:
             route = {
                 "id": route_id,
                 "entity_ref": ref,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
                 "score": score,
                 "playbook": playbook,
                 "priority": priority,
             }
-            if self.store.write_route_if_absent(route):
-                routed += 1
-            else:
-                duplicates += 1
-            route_ids.append(route_id)
+            routes.append(route)
+
+        wrote = self.store.write_routes_if_absent(routes)
+        routed = sum(wrote)
+        duplicates = len(wrote) - routed
+        route_ids = [row["id"] for row in routes]
 
         return Result(
             task_id=task.task_id,
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import hashlib
-import json
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
@@ -10,6 +9,7 @@ from typing import Any
 from ..fs_queue import FilesystemQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Result, Task
+from ._jsonl import append_if_absent, append_many, close_fds, copy_row, copy_rows, find_row, read_rows, store_dir_for
 
 
 def _utc_now_iso() -> str:
@@ -21,8 +21,13 @@ def _stable_hash(parts: list[str]) -> str:
     return hashlib.sha256(payload).hexdigest()[:24]
 
 
-def _priority_rank(priority: str) -> int:
-    return {"high": 0, "medium": 1, "low": 2}.get(str(priority).lower(), 3)
+_PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+_DRAFT_TEMPLATES = {
+    "linkedin": "Hi {entity_ref}, quick note based on {playbook}. Open to connect this week?",
+    "email": "Subject: Quick idea for {entity_ref}\n\nHi {entity_ref},\nBased on {playbook}, sharing a short recommendation.",
+}
 
 
 @dataclass(slots=True)
@@ -36,11 +41,14 @@ class M2JsonlStore:
     token_health_scores_path: Path = field(init=False)
     promise_evaluations_path: Path = field(init=False)
     promise_manual_reviews_path: Path = field(init=False)
+    durable: bool = field(init=False)
+    _append_fds: dict[Path, tuple[int, int]] | None = field(init=False, repr=False, compare=False)
 
-    def __init__(self, workspace: str | Path):
+    def __init__(self, workspace: str | Path, *, durable: bool = False, keep_fds: bool = False):
         self.workspace = Path(workspace)
-        self.store_dir = self.workspace / "store"
-        self.store_dir.mkdir(parents=True, exist_ok=True)
+        # fsync every appended batch, for workspaces that must survive a crash.
+        self.durable = durable
+        self.store_dir = store_dir_for(self.workspace)
         self.routes_path = self.store_dir / "m1_routes.jsonl"
         self.digests_path = self.store_dir / "m2_digests.jsonl"
         self.drafts_path = self.store_dir / "m2_drafts.jsonl"
@@ -48,23 +56,37 @@ class M2JsonlStore:
         self.token_health_scores_path = self.store_dir / "token_health_scores.jsonl"
         self.promise_evaluations_path = self.store_dir / "promise_evaluations.jsonl"
         self.promise_manual_reviews_path = self.store_dir / "promise_manual_reviews.jsonl"
+        # keep_fds holds one append descriptor per store file open across
+        # writes; such stores must be closed (or used as a context manager).
+        self._append_fds = {} if keep_fds else None
+
+    def __enter__(self) -> M2JsonlStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._append_fds is not None:
+            close_fds(self._append_fds)
 
     def recommendation_candidates(self) -> list[dict[str, Any]]:
         rows = self._read_jsonl(self.routes_path)
-        return sorted(
-            rows,
+        rank = _PRIORITY_RANK.get
+        rows.sort(
             key=lambda r: (
-                _priority_rank(str(r.get("priority", ""))),
+                rank(str(r.get("priority", "")).lower(), 3),
                 -float(r.get("score", 0)),
                 str(r.get("entity_ref", "")),
-            ),
+            )
         )
+        return copy_rows(rows)
 
     def latest_digest(self) -> dict[str, Any] | None:
         rows = self._read_jsonl(self.digests_path)
         if not rows:
             return None
-        return rows[-1]
+        return copy_row(rows[-1])
 
     def write_digest_if_absent(self, digest: dict[str, Any]) -> bool:
         return self._write_if_absent(self.digests_path, digest)
@@ -72,50 +94,27 @@ class M2JsonlStore:
     def write_draft_if_absent(self, draft: dict[str, Any]) -> bool:
         return self._write_if_absent(self.drafts_path, draft)
 
+    def write_drafts_if_absent(self, drafts: list[dict[str, Any]]) -> list[bool]:
+        return self._write_many_if_absent(self.drafts_path, drafts)
+
     def write_approval_if_absent(self, approval: dict[str, Any]) -> bool:
         return self._write_if_absent(self.approvals_path, approval)
 
+    def get_digest(self, digest_id: str) -> dict[str, Any] | None:
+        return find_row(self.digests_path, str(digest_id))
+
     def get_draft(self, draft_id: str) -> dict[str, Any] | None:
-        for row in self._read_jsonl(self.drafts_path):
-            if str(row.get("id")) == str(draft_id):
-                return row
-        return None
+        return find_row(self.drafts_path, str(draft_id))
 
     def _write_if_absent(self, path: Path, payload: dict[str, Any]) -> bool:
-        rec_id = str(payload["id"])
-        if self._id_exists(path, rec_id):
-            return False
-        self._append_jsonl(path, payload)
-        return True
+        return append_if_absent(path, str(payload["id"]), payload, fds=self._append_fds, durable=self.durable)
 
-    @staticmethod
-    def _append_jsonl(path: Path, payload: dict[str, Any]) -> None:
-        with path.open("a", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=True)
-            f.write("\n")
+    def _write_many_if_absent(self, path: Path, payloads: list[dict[str, Any]]) -> list[bool]:
+        return append_many(path, [(str(payload["id"]), payload) for payload in payloads], fds=self._append_fds, durable=self.durable)
 
     @staticmethod
     def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-        if not path.exists():
-            return []
-        rows: list[dict[str, Any]] = []
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    rows.append(json.loads(line))
-        return rows
-
-    def _id_exists(self, path: Path, rec_id: str) -> bool:
-        if not path.exists():
-            return False
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                row = json.loads(line)
-                if str(row.get("id")) == rec_id:
-                    return True
-        return False
+        return read_rows(path)
 
 
 @dataclass(slots=True)
@@ -219,22 +218,17 @@ class DrafterWorker:
         channel = str(task.payload.get("channel", "email")).lower()
         digest_id = task.payload.get("digest_id")
 
-        digest = None
         if digest_id is not None:
-            for row in self.store._read_jsonl(self.store.digests_path):
-                if str(row.get("id")) == str(digest_id):
-                    digest = row
-                    break
+            digest = self.store.get_digest(str(digest_id))
         else:
             digest = self.store.latest_digest()
 
         if digest is None:
             return Result(task_id=task.task_id, status="ok", payload={"drafted": 0, "duplicates": 0, "draft_ids": []})
 
-        drafted = 0
-        duplicates = 0
-        draft_ids: list[str] = []
-
+        template = _DRAFT_TEMPLATES.get(channel, _DRAFT_TEMPLATES["email"])
+        now_iso = _utc_now_iso()
+        drafts: list[dict[str, Any]] = []
         for item in digest.get("items", []):
             entity_ref = str(item.get("entity_ref"))
             route_id = str(item.get("route_id"))
@@ -242,10 +236,7 @@ class DrafterWorker:
             rank = int(item.get("rank", 0))
 
             draft_id = f"draft_{_stable_hash([str(digest['id']), entity_ref, channel])}"
-            if channel == "linkedin":
-                body = f"Hi {entity_ref}, quick note based on {playbook}. Open to connect this week?"
-            else:
-                body = f"Subject: Quick idea for {entity_ref}\n\nHi {entity_ref},\nBased on {playbook}, sharing a short recommendation."
+            body = template.format(entity_ref=entity_ref, playbook=playbook)
 
             draft = {
                 "id": draft_id,
@@ -256,13 +247,14 @@ class DrafterWorker:
                 "rank": rank,
                 "playbook": playbook,
                 "body": body,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_draft_if_absent(draft):
-                drafted += 1
-            else:
-                duplicates += 1
-            draft_ids.append(draft_id)
+            drafts.append(draft)
+
+        wrote = self.store.write_drafts_if_absent(drafts)
+        drafted = sum(wrote)
+        duplicates = len(wrote) - drafted
+        draft_ids = [draft["id"] for draft in drafts]
 
         return Result(
             task_id=task.task_id,
@@ -314,35 +306,37 @@ class ApprovalWorker:
 
 def run_local_m2(*, workspace: str | Path, window_key: str, top_n: int = 5, channel: str = "email") -> dict[str, Any]:
     workspace = Path(workspace)
-    store = M2JsonlStore(workspace)
-
-    digest_worker = DigestWorker(store=store)
-    drafter_worker = DrafterWorker(store=store)
-
-    digest_queue = FilesystemQueue(workspace=workspace, worker_name=digest_worker.name)
-    draft_queue = FilesystemQueue(workspace=workspace, worker_name=drafter_worker.name)
-
-    digest_task_id = f"digest_task_{_stable_hash([window_key, str(top_n)])}"
-    digest_queue.enqueue_task(
-        Task(task_id=digest_task_id, task_type="digest", payload={"window_key": window_key, "top_n": top_n})
-    )
-    d_processed = WorkerRunner(queue=digest_queue, worker=digest_worker, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    digest = store.latest_digest()
-    digest_id = digest["id"] if digest else None
-
-    draft_task_id = f"draft_task_{_stable_hash([str(digest_id), channel])}"
-    draft_queue.enqueue_task(
-        Task(task_id=draft_task_id, task_type="draft", payload={"digest_id": digest_id, "channel": channel})
-    )
-    r_processed = WorkerRunner(queue=draft_queue, worker=drafter_worker, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    return {
-        "workspace": str(workspace),
-        "window_key": window_key,
-        "digest_processed": d_processed,
-        "draft_processed": r_processed,
-        "digests_path": str(store.digests_path),
-        "drafts_path": str(store.drafts_path),
-        "approvals_path": str(store.approvals_path),
-    }
+    store = M2JsonlStore(workspace, keep_fds=True)
+    try:
+        digest_worker = DigestWorker(store=store)
+        drafter_worker = DrafterWorker(store=store)
+
+        digest_queue = FilesystemQueue(workspace=workspace, worker_name=digest_worker.name)
+        draft_queue = FilesystemQueue(workspace=workspace, worker_name=drafter_worker.name)
+
+        digest_task_id = f"digest_task_{_stable_hash([window_key, str(top_n)])}"
+        digest_queue.enqueue_task(
+            Task(task_id=digest_task_id, task_type="digest", payload={"window_key": window_key, "top_n": top_n})
+        )
+        d_processed = WorkerRunner(queue=digest_queue, worker=digest_worker, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        digest = store.latest_digest()
+        digest_id = digest["id"] if digest else None
+
+        draft_task_id = f"draft_task_{_stable_hash([str(digest_id), channel])}"
+        draft_queue.enqueue_task(
+            Task(task_id=draft_task_id, task_type="draft", payload={"digest_id": digest_id, "channel": channel})
+        )
+        r_processed = WorkerRunner(queue=draft_queue, worker=drafter_worker, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        return {
+            "workspace": str(workspace),
+            "window_key": window_key,
+            "digest_processed": d_processed,
+            "draft_processed": r_processed,
+            "digests_path": str(store.digests_path),
+            "drafts_path": str(store.drafts_path),
+            "approvals_path": str(store.approvals_path),
+        }
+    finally:
+        store.close()
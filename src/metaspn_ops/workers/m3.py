@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import bisect
 import hashlib
 import json
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice, pairwise
 from pathlib import Path
 from typing import Any
 
 from ..fs_queue import FilesystemQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Result, Task
+from ._jsonl import append_if_absent, append_many, close_fds, copy_row, copy_rows, find_row, read_rows, store_dir_for
 
 
 def _stable_hash(parts: list[str]) -> str:
@@ -21,13 +25,29 @@ def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+@lru_cache(maxsize=4096)
 def _parse_iso(raw: str) -> datetime:
-    dt = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    # Window bounds and row timestamps repeat across calls, so parses are
+    # memoised; fromisoformat reads a trailing "Z" itself on 3.11+.
+    dt = datetime.fromisoformat(str(raw))
     if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
+        return dt.replace(tzinfo=timezone.utc)
+    if dt.tzinfo is timezone.utc:
+        return dt
     return dt.astimezone(timezone.utc)
 
 
+def _failure_taxonomy(priority: str, channel: str, score: float) -> str:
+    # First matching rule wins; callers pass priority and channel lowercased.
+    if priority == "high":
+        return "high_priority_miss"
+    if score < 50:
+        return "low_signal_quality"
+    if channel == "email":
+        return "channel_mismatch"
+    return "unknown_failure"
+
+
 @dataclass(slots=True)
 class M3JsonlStore:
     workspace: Path
@@ -40,11 +60,17 @@ class M3JsonlStore:
     calibration_reviews_path: Path = field(init=False)
     promise_evaluations_path: Path = field(init=False)
     promise_calibration_reports_path: Path = field(init=False)
+    durable: bool = field(init=False)
+    _append_fds: dict[Path, tuple[int, int]] | None = field(init=False, repr=False, compare=False)
+    _time_index: dict[tuple[Path, str], tuple[int, Any, list[datetime], bool]] = field(
+        init=False, repr=False, compare=False
+    )
 
-    def __init__(self, workspace: str | Path):
+    def __init__(self, workspace: str | Path, *, durable: bool = False, keep_fds: bool = False):
         self.workspace = Path(workspace)
-        self.store_dir = self.workspace / "store"
-        self.store_dir.mkdir(parents=True, exist_ok=True)
+        # fsync every appended batch, for workspaces that must survive a crash.
+        self.durable = durable
+        self.store_dir = store_dir_for(self.workspace)
         self.attempts_path = self.store_dir / "m3_attempts.jsonl"
         self.outcomes_path = self.store_dir / "m3_outcomes.jsonl"
         self.evaluations_path = self.store_dir / "m3_evaluations.jsonl"
@@ -53,52 +79,68 @@ class M3JsonlStore:
         self.calibration_reviews_path = self.store_dir / "m3_calibration_reviews.jsonl"
         self.promise_evaluations_path = self.store_dir / "promise_evaluations.jsonl"
         self.promise_calibration_reports_path = self.store_dir / "promise_calibration_reports.jsonl"
+        # keep_fds holds one append descriptor per store file open across
+        # writes; such stores must be closed (or used as a context manager).
+        self._append_fds = {} if keep_fds else None
+        self._time_index = {}
+
+    def __enter__(self) -> M3JsonlStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._append_fds is not None:
+            close_fds(self._append_fds)
 
     def attempts_in_window(self, *, window_start: str, window_end: str) -> list[dict[str, Any]]:
-        start = _parse_iso(window_start)
-        end = _parse_iso(window_end)
-        out = []
-        for row in self._read_jsonl(self.attempts_path):
-            ts = _parse_iso(row["occurred_at"])
-            if start <= ts <= end:
-                out.append(row)
-        return sorted(out, key=lambda r: (str(r.get("occurred_at")), str(r.get("id"))))
+        out = self._rows_in_window(self.attempts_path, "occurred_at", window_start, window_end)
+        return copy_rows(sorted(out, key=lambda r: (str(r.get("occurred_at")), str(r.get("id")))))
 
     def outcomes_for_entity(self, entity_ref: str) -> list[dict[str, Any]]:
         rows = [r for r in self._read_jsonl(self.outcomes_path) if str(r.get("entity_ref")) == str(entity_ref)]
-        return sorted(rows, key=lambda r: (str(r.get("occurred_at")), str(r.get("id"))))
+        return copy_rows(sorted(rows, key=lambda r: (str(r.get("occurred_at")), str(r.get("id")))))
+
+    def outcomes_by_entity(self) -> dict[str, tuple[list[datetime], list[dict[str, Any]]]]:
+        # entity_ref -> (parsed occurred_at, rows), both in time order, so a
+        # caller can bisect instead of rescanning outcomes per attempt.
+        grouped: dict[str, list[tuple[datetime, str, str, dict[str, Any]]]] = {}
+        for r in self._read_jsonl(self.outcomes_path):
+            grouped.setdefault(str(r.get("entity_ref")), []).append(
+                (_parse_iso(r["occurred_at"]), str(r.get("occurred_at")), str(r.get("id")), r)
+            )
+        out = {}
+        for entity_ref, entries in grouped.items():
+            entries.sort(key=lambda e: e[:3])
+            out[entity_ref] = ([e[0] for e in entries], copy_rows(e[3] for e in entries))
+        return out
 
     def failed_evaluations(self, *, window_start: str, window_end: str) -> list[dict[str, Any]]:
-        start = _parse_iso(window_start)
-        end = _parse_iso(window_end)
-        out = []
-        for row in self._read_jsonl(self.evaluations_path):
-            evaluated_at = _parse_iso(row["window_end"])
-            if not row.get("success") and start <= evaluated_at <= end:
-                out.append(row)
-        return sorted(out, key=lambda r: str(r.get("id")))
+        return self.window_and_failed(window_start=window_start, window_end=window_end)[1]
 
     def evaluations_in_window(self, *, window_start: str, window_end: str) -> list[dict[str, Any]]:
-        start = _parse_iso(window_start)
-        end = _parse_iso(window_end)
-        out = []
-        for row in self._read_jsonl(self.evaluations_path):
-            evaluated_at = _parse_iso(row["window_end"])
-            if start <= evaluated_at <= end:
-                out.append(row)
-        return sorted(out, key=lambda r: str(r.get("id")))
+        out = self._rows_in_window(self.evaluations_path, "window_end", window_start, window_end)
+        return copy_rows(sorted(out, key=lambda r: str(r.get("id"))))
+
+    def window_and_failed(
+        self, *, window_start: str, window_end: str
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        # One read and sort of the evaluations serves both views.
+        evaluations = self.evaluations_in_window(window_start=window_start, window_end=window_end)
+        return evaluations, [row for row in evaluations if not row.get("success")]
 
     def latest_calibration_report(self) -> dict[str, Any] | None:
         rows = self._read_jsonl(self.calibration_reports_path)
         if not rows:
             return None
-        return rows[-1]
+        return copy_row(rows[-1])
+
+    def get_calibration_report(self, report_id: str) -> dict[str, Any] | None:
+        return find_row(self.calibration_reports_path, str(report_id))
 
     def find_calibration_report(self, report_id: str) -> dict[str, Any] | None:
-        for row in self._read_jsonl(self.calibration_reports_path):
-            if str(row.get("id")) == str(report_id):
-                return row
-        return None
+        return self.get_calibration_report(report_id)
 
     def write_evaluation_if_absent(self, row: dict[str, Any]) -> bool:
         return self._write_if_absent(self.evaluations_path, row)
@@ -106,47 +148,48 @@ class M3JsonlStore:
     def write_failure_if_absent(self, row: dict[str, Any]) -> bool:
         return self._write_if_absent(self.failures_path, row)
 
+    def write_evaluations_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return self._write_many_if_absent(self.evaluations_path, rows)
+
+    def write_failures_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return self._write_many_if_absent(self.failures_path, rows)
+
     def write_calibration_report_if_absent(self, row: dict[str, Any]) -> bool:
         return self._write_if_absent(self.calibration_reports_path, row)
 
     def write_calibration_review_if_absent(self, row: dict[str, Any]) -> bool:
         return self._write_if_absent(self.calibration_reviews_path, row)
 
+    def _rows_in_window(self, path: Path, time_field: str, window_start: str, window_end: str) -> list[dict[str, Any]]:
+        start = _parse_iso(window_start)
+        end = _parse_iso(window_end)
+        rows = self._read_jsonl(path)
+        # (path, field) -> (rows indexed, last indexed row, parsed times in
+        # file order, whether those times never decrease). Cached rows are
+        # shared and only grow, so the index is extended while its last row
+        # is still in place and rebuilt when the file was rewritten.
+        key = (path, time_field)
+        count, last, times, ordered = self._time_index.get(key, (0, None, [], True))
+        if count > len(rows) or (count and rows[count - 1] is not last):
+            count, times, ordered = 0, [], True
+        if count < len(rows):
+            fresh = [_parse_iso(row[time_field]) for row in islice(rows, count, None)]
+            ordered = ordered and all(a <= b for a, b in pairwise(times[-1:] + fresh))
+            times = times + fresh
+        self._time_index[key] = (len(rows), rows[-1] if rows else None, times, ordered)
+        if ordered:
+            return rows[bisect.bisect_left(times, start) : bisect.bisect_right(times, end)]
+        return [row for row, ts in zip(rows, times) if start <= ts <= end]
+
     def _write_if_absent(self, path: Path, payload: dict[str, Any]) -> bool:
-        rec_id = str(payload["id"])
-        if self._id_exists(path, rec_id):
-            return False
-        self._append_jsonl(path, payload)
-        return True
+        return append_if_absent(path, str(payload["id"]), payload, fds=self._append_fds, durable=self.durable)
 
-    @staticmethod
-    def _append_jsonl(path: Path, payload: dict[str, Any]) -> None:
-        with path.open("a", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=True)
-            f.write("\n")
+    def _write_many_if_absent(self, path: Path, payloads: list[dict[str, Any]]) -> list[bool]:
+        return append_many(path, [(str(payload["id"]), payload) for payload in payloads], fds=self._append_fds, durable=self.durable)
 
     @staticmethod
     def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-        if not path.exists():
-            return []
-        rows: list[dict[str, Any]] = []
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    rows.append(json.loads(line))
-        return rows
-
-    def _id_exists(self, path: Path, rec_id: str) -> bool:
-        if not path.exists():
-            return False
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                row = json.loads(line)
-                if str(row.get("id")) == rec_id:
-                    return True
-        return False
+        return read_rows(path)
 
 
 @dataclass(slots=True)
@@ -160,21 +203,19 @@ class OutcomeEvaluatorWorker:
         success_within_hours = int(task.payload.get("success_within_hours", 72))
 
         attempts = self.store.attempts_in_window(window_start=window_start, window_end=window_end)
-        evaluated = 0
-        successes = 0
-        duplicates = 0
-
+        outcomes = self.store.outcomes_by_entity()
+        within = timedelta(hours=success_within_hours)
+        no_outcomes: tuple[list[datetime], list[dict[str, Any]]] = ([], [])
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for attempt in attempts:
             attempt_at = _parse_iso(attempt["occurred_at"])
-            deadline = attempt_at + timedelta(hours=success_within_hours)
-            outcomes = self.store.outcomes_for_entity(str(attempt.get("entity_ref")))
+            times, entity_outcomes = outcomes.get(str(attempt.get("entity_ref")), no_outcomes)
 
             matched = None
-            for outcome in outcomes:
-                outcome_at = _parse_iso(outcome["occurred_at"])
-                if attempt_at <= outcome_at <= deadline:
-                    matched = outcome
-                    break
+            idx = bisect.bisect_left(times, attempt_at)
+            if idx < len(times) and times[idx] <= attempt_at + within:
+                matched = entity_outcomes[idx]
 
             evaluation_id = f"eval_{_stable_hash([str(attempt['id']), window_end, str(success_within_hours)])}"
             row = {
@@ -187,14 +228,14 @@ class OutcomeEvaluatorWorker:
                 "success": matched is not None,
                 "matched_outcome_id": matched.get("id") if matched else None,
                 "attempt": attempt,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            wrote = self.store.write_evaluation_if_absent(row)
-            evaluated += 1
-            if row["success"]:
-                successes += 1
-            if not wrote:
-                duplicates += 1
+            rows.append(row)
+
+        wrote = self.store.write_evaluations_if_absent(rows)
+        evaluated = len(rows)
+        successes = sum(1 for row in rows if row["success"])
+        duplicates = evaluated - sum(wrote)
 
         return Result(
             task_id=task.task_id,
@@ -219,23 +260,15 @@ class FailureAnalystWorker:
         window_end = str(task.payload["window_end"])
 
         failures = self.store.failed_evaluations(window_start=window_start, window_end=window_end)
-        labeled = 0
-        duplicates = 0
-
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for ev in failures:
             attempt = ev.get("attempt") or {}
             priority = str(attempt.get("priority", "")).lower()
             channel = str(attempt.get("channel", "")).lower()
             score = float(attempt.get("score", 0))
 
-            if priority == "high":
-                taxonomy = "high_priority_miss"
-            elif score < 50:
-                taxonomy = "low_signal_quality"
-            elif channel == "email":
-                taxonomy = "channel_mismatch"
-            else:
-                taxonomy = "unknown_failure"
+            taxonomy = _failure_taxonomy(priority, channel, score)
 
             failure_id = f"failure_{_stable_hash([str(ev['id']), taxonomy])}"
             row = {
@@ -252,12 +285,13 @@ class FailureAnalystWorker:
                 },
                 "window_start": window_start,
                 "window_end": window_end,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_failure_if_absent(row):
-                labeled += 1
-            else:
-                duplicates += 1
+            rows.append(row)
+
+        wrote = self.store.write_failures_if_absent(rows)
+        labeled = sum(wrote)
+        duplicates = len(wrote) - labeled
 
         return Result(
             task_id=task.task_id,
@@ -278,8 +312,7 @@ class CalibrationReporterWorker:
         baseline_threshold = float(task.payload.get("baseline_threshold", 70))
         baseline_cooldown_hours = int(task.payload.get("baseline_cooldown_hours", 48))
 
-        evaluations = self.store.evaluations_in_window(window_start=window_start, window_end=window_end)
-        failures = self.store.failed_evaluations(window_start=window_start, window_end=window_end)
+        evaluations, failures = self.store.window_and_failed(window_start=window_start, window_end=window_end)
 
         total = len(evaluations)
         failed = len(failures)
@@ -341,7 +374,7 @@ class CalibrationReviewWorker:
         reviewer = str(task.payload.get("reviewer", "human"))
         override_policy = task.payload.get("override_policy")
 
-        report = self.store.find_calibration_report(report_id)
+        report = self.store.get_calibration_report(report_id)
         if report is None:
             raise ValueError(f"calibration report not found: {report_id}")
         if decision not in {"approve", "edit", "reject"}:
@@ -385,75 +418,77 @@ def run_local_m3(
     auto_review_decision: str | None = None,
 ) -> dict[str, Any]:
     workspace = Path(workspace)
-    store = M3JsonlStore(workspace)
-
-    evaluator = OutcomeEvaluatorWorker(store=store)
-    analyst = FailureAnalystWorker(store=store)
-    reporter = CalibrationReporterWorker(store=store)
-    reviewer = CalibrationReviewWorker(store=store)
-
-    q_eval = FilesystemQueue(workspace=workspace, worker_name=evaluator.name)
-    q_fail = FilesystemQueue(workspace=workspace, worker_name=analyst.name)
-    q_rep = FilesystemQueue(workspace=workspace, worker_name=reporter.name)
-
-    q_eval.enqueue_task(
-        Task(
-            task_id=f"m3_eval_{_stable_hash([window_start, window_end, str(success_within_hours)])}",
-            task_type="evaluate_outcomes",
-            payload={
-                "window_start": window_start,
-                "window_end": window_end,
-                "success_within_hours": success_within_hours,
-            },
+    store = M3JsonlStore(workspace, keep_fds=True)
+    try:
+        evaluator = OutcomeEvaluatorWorker(store=store)
+        analyst = FailureAnalystWorker(store=store)
+        reporter = CalibrationReporterWorker(store=store)
+        reviewer = CalibrationReviewWorker(store=store)
+
+        q_eval = FilesystemQueue(workspace=workspace, worker_name=evaluator.name)
+        q_fail = FilesystemQueue(workspace=workspace, worker_name=analyst.name)
+        q_rep = FilesystemQueue(workspace=workspace, worker_name=reporter.name)
+
+        q_eval.enqueue_task(
+            Task(
+                task_id=f"m3_eval_{_stable_hash([window_start, window_end, str(success_within_hours)])}",
+                task_type="evaluate_outcomes",
+                payload={
+                    "window_start": window_start,
+                    "window_end": window_end,
+                    "success_within_hours": success_within_hours,
+                },
+            )
         )
-    )
-    eval_processed = WorkerRunner(queue=q_eval, worker=evaluator, config=RunnerConfig(once=True, max_tasks=1)).run()
+        eval_processed = WorkerRunner(queue=q_eval, worker=evaluator, config=RunnerConfig(once=True, max_tasks=1)).run()
 
-    q_fail.enqueue_task(
-        Task(
-            task_id=f"m3_fail_{_stable_hash([window_start, window_end])}",
-            task_type="analyze_failures",
-            payload={"window_start": window_start, "window_end": window_end},
+        q_fail.enqueue_task(
+            Task(
+                task_id=f"m3_fail_{_stable_hash([window_start, window_end])}",
+                task_type="analyze_failures",
+                payload={"window_start": window_start, "window_end": window_end},
+            )
         )
-    )
-    fail_processed = WorkerRunner(queue=q_fail, worker=analyst, config=RunnerConfig(once=True, max_tasks=1)).run()
+        fail_processed = WorkerRunner(queue=q_fail, worker=analyst, config=RunnerConfig(once=True, max_tasks=1)).run()
 
-    q_rep.enqueue_task(
-        Task(
-            task_id=f"m3_report_{_stable_hash([window_start, window_end])}",
-            task_type="report_calibration",
-            payload={"window_start": window_start, "window_end": window_end},
+        q_rep.enqueue_task(
+            Task(
+                task_id=f"m3_report_{_stable_hash([window_start, window_end])}",
+                task_type="report_calibration",
+                payload={"window_start": window_start, "window_end": window_end},
+            )
         )
-    )
-    report_processed = WorkerRunner(queue=q_rep, worker=reporter, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    review_processed = 0
-    if auto_review_decision is not None:
-        latest = store.latest_calibration_report()
-        if latest is not None:
-            q_rev = FilesystemQueue(workspace=workspace, worker_name=reviewer.name)
-            q_rev.enqueue_task(
-                Task(
-                    task_id=f"m3_review_{_stable_hash([str(latest['id']), auto_review_decision])}",
-                    task_type="review_calibration",
-                    payload={
-                        "report_id": latest["id"],
-                        "decision": auto_review_decision,
-                    },
+        report_processed = WorkerRunner(queue=q_rep, worker=reporter, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        review_processed = 0
+        if auto_review_decision is not None:
+            latest = store.latest_calibration_report()
+            if latest is not None:
+                q_rev = FilesystemQueue(workspace=workspace, worker_name=reviewer.name)
+                q_rev.enqueue_task(
+                    Task(
+                        task_id=f"m3_review_{_stable_hash([str(latest['id']), auto_review_decision])}",
+                        task_type="review_calibration",
+                        payload={
+                            "report_id": latest["id"],
+                            "decision": auto_review_decision,
+                        },
+                    )
                 )
-            )
-            review_processed = WorkerRunner(queue=q_rev, worker=reviewer, config=RunnerConfig(once=True, max_tasks=1)).run()
-
-    return {
-        "workspace": str(workspace),
-        "window_start": window_start,
-        "window_end": window_end,
-        "eval_processed": eval_processed,
-        "fail_processed": fail_processed,
-        "report_processed": report_processed,
-        "review_processed": review_processed,
-        "evaluations_path": str(store.evaluations_path),
-        "failures_path": str(store.failures_path),
-        "calibration_reports_path": str(store.calibration_reports_path),
-        "calibration_reviews_path": str(store.calibration_reviews_path),
-    }
+                review_processed = WorkerRunner(queue=q_rev, worker=reviewer, config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        return {
+            "workspace": str(workspace),
+            "window_start": window_start,
+            "window_end": window_end,
+            "eval_processed": eval_processed,
+            "fail_processed": fail_processed,
+            "report_processed": report_processed,
+            "review_processed": review_processed,
+            "evaluations_path": str(store.evaluations_path),
+            "failures_path": str(store.failures_path),
+            "calibration_reports_path": str(store.calibration_reports_path),
+            "calibration_reviews_path": str(store.calibration_reviews_path),
+        }
+    finally:
+        store.close()
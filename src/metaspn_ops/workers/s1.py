@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import bisect
 import hashlib
-import json
 from dataclasses import dataclass, field
+from collections.abc import Callable
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -10,6 +11,7 @@ from typing import Any
 from ..fs_queue import FilesystemQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Result, Task
+from ._jsonl import append_if_absent, append_many, copy_rows, read_rows, rows_where, store_dir_for
 
 
 def _utc_now_iso() -> str:
@@ -22,25 +24,23 @@ def _stable_hash(parts: list[str]) -> str:
 
 
 def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-    if not path.exists():
-        return []
-    rows: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                rows.append(json.loads(line))
-    return rows
+    return read_rows(path)
 
 
 def _append_if_absent(path: Path, row: dict[str, Any]) -> bool:
-    rec_id = str(row["id"])
-    for existing in _read_jsonl(path):
-        if str(existing.get("id")) == rec_id:
-            return False
-    with path.open("a", encoding="utf-8") as f:
-        json.dump(row, f, ensure_ascii=True)
-        f.write("\n")
-    return True
+    return append_if_absent(path, str(row["id"]), row)
+
+
+def _append_many_if_absent(path: Path, rows: list[dict[str, Any]]) -> list[bool]:
+    return append_many(path, [(str(row["id"]), row) for row in rows])
+
+
+def _entity_order(row: dict[str, Any]) -> tuple[str, str]:
+    return str(row.get("entity_ref", "")), str(row.get("id", ""))
+
+
+def _subject_order(row: dict[str, Any]) -> tuple[str, str]:
+    return str(row.get("subject_ref", "")), str(row.get("id", ""))
 
 
 @dataclass(slots=True)
@@ -52,32 +52,61 @@ class S1JsonlStore:
     reward_projections_path: Path = field(init=False)
     settlements_path: Path = field(init=False)
     summaries_path: Path = field(init=False)
+    _sorted_cache: dict[Path, tuple[str | None, int, Any, list[dict[str, Any]]]] = field(
+        init=False, repr=False, compare=False
+    )
 
     def __init__(self, workspace: str | Path):
         self.workspace = Path(workspace)
-        self.store_dir = self.workspace / "store"
-        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.store_dir = store_dir_for(self.workspace)
         self.m1_scores_path = self.store_dir / "m1_scores.jsonl"
         self.attention_scores_path = self.store_dir / "s1_attention_scores.jsonl"
         self.reward_projections_path = self.store_dir / "s1_reward_projections.jsonl"
         self.settlements_path = self.store_dir / "s1_settlements.jsonl"
         self.summaries_path = self.store_dir / "s1_summaries.jsonl"
+        self._sorted_cache = {}
 
     def scored_entities(self) -> list[dict[str, Any]]:
         rows = _read_jsonl(self.m1_scores_path)
-        return sorted(rows, key=lambda r: (str(r.get("entity_ref", "")), str(r.get("id", ""))))
+        return self._sorted(self.m1_scores_path, None, rows, _entity_order)
 
     def attention_for_date(self, date_key: str) -> list[dict[str, Any]]:
-        rows = [r for r in _read_jsonl(self.attention_scores_path) if str(r.get("season_date")) == date_key]
-        return sorted(rows, key=lambda r: (str(r.get("subject_ref", "")), str(r.get("id", ""))))
+        rows = rows_where(self.attention_scores_path, "season_date", str(date_key))
+        return self._sorted(self.attention_scores_path, str(date_key), rows, _subject_order)
 
     def projections_for_date(self, date_key: str) -> list[dict[str, Any]]:
-        rows = [r for r in _read_jsonl(self.reward_projections_path) if str(r.get("season_date")) == date_key]
-        return sorted(rows, key=lambda r: (str(r.get("subject_ref", "")), str(r.get("id", ""))))
+        rows = rows_where(self.reward_projections_path, "season_date", str(date_key))
+        return self._sorted(self.reward_projections_path, str(date_key), rows, _subject_order)
 
     def settlements_for_date(self, date_key: str) -> list[dict[str, Any]]:
-        rows = [r for r in _read_jsonl(self.settlements_path) if str(r.get("season_date")) == date_key]
-        return sorted(rows, key=lambda r: (str(r.get("subject_ref", "")), str(r.get("id", ""))))
+        rows = rows_where(self.settlements_path, "season_date", str(date_key))
+        return self._sorted(self.settlements_path, str(date_key), rows, _subject_order)
+
+    def _sorted(
+        self,
+        path: Path,
+        date_key: str | None,
+        rows: list[dict[str, Any]],
+        order: Callable[[dict[str, Any]], tuple[str, str]],
+    ) -> list[dict[str, Any]]:
+        # path -> (date key, rows seen, last row seen, those rows in order),
+        # kept for the latest date queried per file only. Query rows come from
+        # the shared row cache and only grow, so a few rows appended since the
+        # last call are inserted into the kept order instead of sorting
+        # everything again; anything else is re-sorted.
+        cached_key, count, last, ordered = self._sorted_cache.get(path, (None, 0, None, []))
+        if cached_key != date_key or count > len(rows) or (count and rows[count - 1] is not last):
+            count, ordered = 0, []
+        if count < len(rows):
+            fresh = rows[count:]
+            if ordered and len(fresh) <= 32:
+                ordered = list(ordered)
+                for row in fresh:
+                    bisect.insort(ordered, row, key=order)
+            else:
+                ordered = sorted([*ordered, *fresh], key=order)
+        self._sorted_cache[path] = (date_key, len(rows), rows[-1] if rows else None, ordered)
+        return copy_rows(ordered)
 
     def write_attention_if_absent(self, row: dict[str, Any]) -> bool:
         return _append_if_absent(self.attention_scores_path, row)
@@ -91,6 +120,15 @@ class S1JsonlStore:
     def write_summary_if_absent(self, row: dict[str, Any]) -> bool:
         return _append_if_absent(self.summaries_path, row)
 
+    def write_attention_rows_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.attention_scores_path, rows)
+
+    def write_projections_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.reward_projections_path, rows)
+
+    def write_settlements_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.settlements_path, rows)
+
 
 @dataclass(slots=True)
 class UpdateAttentionScoresWorker:
@@ -101,10 +139,8 @@ class UpdateAttentionScoresWorker:
         season_date = str(task.payload["date"])
         scored = self.store.scored_entities()
 
-        updated = 0
-        duplicates = 0
-        attention_ids: list[str] = []
-
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for row in scored:
             subject_ref = str(row.get("entity_ref"))
             base_score = float(row.get("score", 0.0))
@@ -118,13 +154,14 @@ class UpdateAttentionScoresWorker:
                 "attention_score": attention,
                 "source_score": base_score,
                 "model": "season1.attention.v1",
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_attention_if_absent(out):
-                updated += 1
-            else:
-                duplicates += 1
-            attention_ids.append(attention_id)
+            rows.append(out)
+
+        wrote = self.store.write_attention_rows_if_absent(rows)
+        updated = sum(wrote)
+        duplicates = len(wrote) - updated
+        attention_ids = [out["id"] for out in rows]
 
         return Result(
             task_id=task.task_id,
@@ -150,10 +187,8 @@ class ProjectRewardsWorker:
         multiplier = float(task.payload.get("multiplier", 1.2))
         attention_rows = self.store.attention_for_date(season_date)
 
-        projected = 0
-        duplicates = 0
-        projection_ids: list[str] = []
-
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for att in attention_rows:
             subject_ref = str(att.get("subject_ref"))
             attention_score = float(att.get("attention_score", 0.0))
@@ -169,13 +204,14 @@ class ProjectRewardsWorker:
                 "multiplier": multiplier,
                 "projected_reward": projected_reward,
                 "tier": tier,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_projection_if_absent(out):
-                projected += 1
-            else:
-                duplicates += 1
-            projection_ids.append(projection_id)
+            rows.append(out)
+
+        wrote = self.store.write_projections_if_absent(rows)
+        projected = sum(wrote)
+        duplicates = len(wrote) - projected
+        projection_ids = [out["id"] for out in rows]
 
         return Result(
             task_id=task.task_id,
@@ -200,10 +236,8 @@ class SettleSeasonWorker:
         season_date = str(task.payload["date"])
         projections = self.store.projections_for_date(season_date)
 
-        settled = 0
-        duplicates = 0
-        settlement_ids: list[str] = []
-
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for projection in projections:
             subject_ref = str(projection.get("subject_ref"))
             projected_reward = float(projection.get("projected_reward", 0.0))
@@ -216,13 +250,14 @@ class SettleSeasonWorker:
                 "projected_reward": projected_reward,
                 "status": "settled",
                 "tx_ref": tx_ref,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_settlement_if_absent(out):
-                settled += 1
-            else:
-                duplicates += 1
-            settlement_ids.append(settlement_id)
+            rows.append(out)
+
+        wrote = self.store.write_settlements_if_absent(rows)
+        settled = sum(wrote)
+        duplicates = len(wrote) - settled
+        settlement_ids = [out["id"] for out in rows]
 
         return Result(
             task_id=task.task_id,
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import hashlib
-import json
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
@@ -10,6 +9,7 @@ from typing import Any
 from ..fs_queue import FilesystemQueue
 from ..runner import RunnerConfig, WorkerRunner
 from ..types import Result, Task
+from ._jsonl import append_if_absent, append_many, copy_row, copy_rows, read_rows, store_dir_for
 
 
 def _utc_now_iso() -> str:
@@ -22,25 +22,15 @@ def _stable_hash(parts: list[str]) -> str:
 
 
 def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-    if not path.exists():
-        return []
-    out: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                out.append(json.loads(line))
-    return out
+    return read_rows(path)
 
 
 def _append_if_absent(path: Path, row: dict[str, Any]) -> bool:
-    rec_id = str(row["id"])
-    for existing in _read_jsonl(path):
-        if str(existing.get("id")) == rec_id:
-            return False
-    with path.open("a", encoding="utf-8") as f:
-        json.dump(row, f, ensure_ascii=True)
-        f.write("\n")
-    return True
+    return append_if_absent(path, str(row["id"]), row)
+
+
+def _append_many_if_absent(path: Path, rows: list[dict[str, Any]]) -> list[bool]:
+    return append_many(path, [(str(row["id"]), row) for row in rows])
 
 
 @dataclass(slots=True)
@@ -57,8 +47,7 @@ class TokenPromiseStore:
 
     def __init__(self, workspace: str | Path):
         self.workspace = Path(workspace)
-        self.store_dir = self.workspace / "store"
-        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.store_dir = store_dir_for(self.workspace)
         self.token_signals_path = self.store_dir / "token_signals.jsonl"
         self.token_resolutions_path = self.store_dir / "token_resolutions.jsonl"
         self.token_health_scores_path = self.store_dir / "token_health_scores.jsonl"
@@ -73,7 +62,7 @@ class TokenPromiseStore:
         for row in _read_jsonl(self.token_signals_path):
             if str(row.get("id")) in resolved_signal_ids:
                 continue
-            out.append(row)
+            out.append(copy_row(row))
             if len(out) >= limit:
                 break
         return out
@@ -85,7 +74,7 @@ class TokenPromiseStore:
             token_id = str(row.get("token_id"))
             if token_id in scored_token_ids:
                 continue
-            out.append(row)
+            out.append(copy_row(row))
             if len(out) >= limit:
                 break
         return out
@@ -98,14 +87,14 @@ class TokenPromiseStore:
             promise_id = str(row.get("id"))
             if promise_id in evaluated_ids or promise_id in reviewed_ids:
                 continue
-            out.append(row)
+            out.append(copy_row(row))
             if len(out) >= limit:
                 break
         return out
 
     def evaluated_promises(self, *, limit: int = 1000) -> list[dict[str, Any]]:
         rows = _read_jsonl(self.promise_evaluations_path)
-        return rows[:limit]
+        return copy_rows(rows[:limit])
 
     def write_token_resolution_if_absent(self, row: dict[str, Any]) -> bool:
         return _append_if_absent(self.token_resolutions_path, row)
@@ -122,6 +111,18 @@ class TokenPromiseStore:
     def write_promise_calibration_report_if_absent(self, row: dict[str, Any]) -> bool:
         return _append_if_absent(self.promise_calibration_reports_path, row)
 
+    def write_token_resolutions_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.token_resolutions_path, rows)
+
+    def write_token_health_scores_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.token_health_scores_path, rows)
+
+    def write_promise_evaluations_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.promise_evaluations_path, rows)
+
+    def write_promise_manual_reviews_if_absent(self, rows: list[dict[str, Any]]) -> list[bool]:
+        return _append_many_if_absent(self.promise_manual_reviews_path, rows)
+
 
 @dataclass(slots=True)
 class ResolveTokenWorker:
@@ -131,10 +132,8 @@ class ResolveTokenWorker:
     def handle(self, task: Task) -> Result:
         limit = int(task.payload.get("limit", 100))
         pending = self.store.unresolved_token_signals(limit=limit)
-        resolved = 0
-        duplicates = 0
-        resolution_ids: list[str] = []
-
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for signal in pending:
             signal_id = str(signal["id"])
             token_raw = str(signal.get("token_ref") or signal.get("payload", {}).get("token_ref") or signal_id)
@@ -145,13 +144,14 @@ class ResolveTokenWorker:
                 "signal_id": signal_id,
                 "token_id": token_id,
                 "network": str(signal.get("network", "unknown")),
-                "occurred_at": str(signal.get("occurred_at") or _utc_now_iso()),
+                "occurred_at": str(signal.get("occurred_at") or now_iso),
             }
-            if self.store.write_token_resolution_if_absent(row):
-                resolved += 1
-            else:
-                duplicates += 1
-            resolution_ids.append(resolution_id)
+            rows.append(row)
+
+        wrote = self.store.write_token_resolutions_if_absent(rows)
+        resolved = sum(wrote)
+        duplicates = len(wrote) - resolved
+        resolution_ids = [row["id"] for row in rows]
 
         return Result(
             task_id=task.task_id,
@@ -169,10 +169,8 @@ class TokenHealthScorerWorker:
     def handle(self, task: Task) -> Result:
         limit = int(task.payload.get("limit", 100))
         pending = self.store.unresolved_token_resolutions(limit=limit)
-        scored = 0
-        duplicates = 0
-        score_ids: list[str] = []
-
+        now_iso = _utc_now_iso()
+        rows: list[dict[str, Any]] = []
         for res in pending:
             token_id = str(res["token_id"])
             network = str(res.get("network", "unknown"))
@@ -187,13 +185,14 @@ class TokenHealthScorerWorker:
                 "token_id": token_id,
                 "network": network,
                 "health_score": health_score,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_token_health_score_if_absent(row):
-                scored += 1
-            else:
-                duplicates += 1
-            score_ids.append(score_id)
+            rows.append(row)
+
+        wrote = self.store.write_token_health_scores_if_absent(rows)
+        scored = sum(wrote)
+        duplicates = len(wrote) - scored
+        score_ids = [row["id"] for row in rows]
 
         return Result(
             task_id=task.task_id,
@@ -212,12 +211,9 @@ class PromiseEvaluatorWorker:
         limit = int(task.payload.get("limit", 100))
         pending = self.store.unevaluated_promises(limit=limit)
 
-        evaluated = 0
-        routed_manual = 0
-        duplicates = 0
-        evaluation_ids: list[str] = []
-        manual_ids: list[str] = []
-
+        now_iso = _utc_now_iso()
+        evaluations: list[dict[str, Any]] = []
+        manual_reviews: list[dict[str, Any]] = []
         for promise in pending:
             promise_id = str(promise["id"])
             path = str(promise.get("evaluation_path", "observable_signal"))
@@ -230,13 +226,9 @@ class PromiseEvaluatorWorker:
                     "promise_id": promise_id,
                     "decision": "pending",
                     "reason": "requires_human_judgment",
-                    "occurred_at": _utc_now_iso(),
+                    "occurred_at": now_iso,
                 }
-                if self.store.write_promise_manual_review_if_absent(row):
-                    routed_manual += 1
-                else:
-                    duplicates += 1
-                manual_ids.append(manual_id)
+                manual_reviews.append(row)
                 continue
 
             if path == "on_chain":
@@ -252,13 +244,17 @@ class PromiseEvaluatorWorker:
                 "expected_success": expected,
                 "observed_success": observed_success,
                 "correct": expected == observed_success,
-                "occurred_at": _utc_now_iso(),
+                "occurred_at": now_iso,
             }
-            if self.store.write_promise_evaluation_if_absent(row):
-                evaluated += 1
-            else:
-                duplicates += 1
-            evaluation_ids.append(evaluation_id)
+            evaluations.append(row)
+
+        wrote_manual = self.store.write_promise_manual_reviews_if_absent(manual_reviews)
+        wrote_evaluations = self.store.write_promise_evaluations_if_absent(evaluations)
+        routed_manual = sum(wrote_manual)
+        evaluated = sum(wrote_evaluations)
+        duplicates = len(wrote_manual) + len(wrote_evaluations) - routed_manual - evaluated
+        evaluation_ids = [row["id"] for row in evaluations]
+        manual_ids = [row["id"] for row in manual_reviews]
 
         return Result(
             task_id=task.task_id,
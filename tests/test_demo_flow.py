@@ -5,7 +5,7 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from metaspn_ops.workers.demo import run_demo_once
+from metaspn_ops.workers.demo import run_demo_once, seed_resolved_entities
 
 
 class DemoFlowTests(unittest.TestCase):
@@ -84,6 +84,35 @@ class DemoFlowTests(unittest.TestCase):
         self.assertEqual(len(routes), 2)
         self.assertEqual(len(digests), 1)
         self.assertEqual(len(drafts), 2)
+        self.assertFalse((self.workspace / "inbox").exists())
+
+    def test_demo_persist_keeps_queue_folders(self):
+        summary = run_demo_once(
+            workspace=self.workspace,
+            window_key="2026-02-06",
+            top_n=2,
+            resolved_entities_jsonl=self.resolved_path,
+            persist=True,
+        )
+
+        self.assertEqual(summary["digest_processed"], 1)
+        runs = sorted(p.parent.name for p in (self.workspace / "runs").glob("*/*.json"))
+        self.assertEqual(runs, ["digest_recommendations", "profile_entity", "route_entity", "score_entity"])
+
+    def test_seed_sees_rows_appended_by_other_writers(self):
+        first = seed_resolved_entities(workspace=self.workspace, resolved_entities_jsonl=self.resolved_path)
+        self.assertEqual(first, {"inserted": 2, "duplicates": 0})
+
+        emissions_path = self.workspace / "store" / "emissions.jsonl"
+        with emissions_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "res-3", "entity_ref": "person:carol"}) + "\n")
+        with self.resolved_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "res-3", "entity_ref": "person:carol"}) + "\n")
+            f.write(json.dumps({"id": "res-4", "entity_ref": "person:dave"}) + "\n")
+
+        second = seed_resolved_entities(workspace=self.workspace, resolved_entities_jsonl=self.resolved_path)
+        self.assertEqual(second, {"inserted": 1, "duplicates": 3})
+        self.assertEqual(len(emissions_path.read_text(encoding="utf-8").splitlines()), 4)
 
 
 if __name__ == "__main__":
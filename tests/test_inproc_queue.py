@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from metaspn_ops.inproc_queue import InProcQueue
+from metaspn_ops.runner import RunnerConfig, WorkerRunner
+from metaspn_ops.types import Result, Task
+
+
+class EchoWorker:
+    name = "enrich"
+
+    def handle(self, task: Task) -> Result:
+        return Result(task_id=task.task_id, status="ok", payload={"seen": task.payload})
+
+
+class InProcQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.queue = InProcQueue(worker_name="enrich")
+
+    def test_deterministic_ordering_and_leases(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset, task_id in enumerate(["a", "b", "c"]):
+            self.queue.enqueue_task(Task(task_id=task_id, task_type="x", payload={}), scheduled_for=base + timedelta(seconds=offset))
+
+        first = self.queue.lease_next_tasks(owner="r1", lease_seconds=20, n=2)
+        second = self.queue.lease_next_tasks(owner="r2", lease_seconds=20, n=2)
+
+        self.assertEqual([handle for _, handle in first], ["a", "b"])
+        self.assertEqual([handle for _, handle in second], ["c"])
+        self.assertEqual(self.queue.stats()["locks"], 3)
+
+    def test_future_tasks_are_not_leased(self):
+        later = datetime.now(timezone.utc) + timedelta(minutes=5)
+        self.queue.enqueue_task(Task(task_id="later", task_type="x", payload={}), scheduled_for=later)
+        self.assertIsNone(self.queue.lease_next_task(owner="r", lease_seconds=20))
+        self.assertEqual(self.queue.stats()["inbox"], 1)
+
+    def test_retry_and_deadletter(self):
+        self.queue.enqueue_task(Task(task_id="t-retry", task_type="x", payload={}, max_attempts=2))
+        task, handle = self.queue.lease_next_task(owner="r", lease_seconds=10)
+        self.queue.fail_task(handle, task, "boom")
+        self.assertIsNone(self.queue.lease_next_task(owner="r", lease_seconds=10))
+
+        self.queue.enqueue_task(task, scheduled_for=datetime.now(timezone.utc) - timedelta(seconds=1))
+        task, handle = self.queue.lease_next_task(owner="r", lease_seconds=10)
+        self.queue.fail_task(handle, task, "permanent")
+
+        self.assertEqual(self.queue.deadletter_items(), ["t-retry"])
+        self.assertEqual(self.queue.retry_deadletter(task_id="t-retry"), 1)
+        stats = self.queue.stats()
+        self.assertEqual((stats["inbox"], stats["deadletter"]), (1, 0))
+
+    def test_runner_hands_objects_over_by_reference(self):
+        task = Task(task_id="ref", task_type="x", payload={"i": 1})
+        self.queue.enqueue_task(task)
+
+        processed = WorkerRunner(queue=self.queue, worker=EchoWorker(), config=RunnerConfig(once=True, max_tasks=1)).run()
+
+        self.assertEqual(processed, 1)
+        snapshot = self.queue.snapshot()
+        self.assertIs(snapshot["results"][0].payload["seen"], task.payload)
+        self.assertEqual([r.status for r in snapshot["runs"]], ["ok"])
+        self.assertEqual(self.queue.stats()["inbox"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import json
+import os
 import tempfile
+import time
 import unittest
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from metaspn_ops.lease import LeaseManager
+from metaspn_ops.lease import _LEASE_HEADER, FlockLeaseManager, LeaseManager
 
 
 class LeaseRaceTests(unittest.TestCase):
@@ -37,5 +39,59 @@ class LeaseRaceTests(unittest.TestCase):
             self.assertEqual(lease.owner, "o2")
 
 
+    def test_abandoned_partial_lock_is_reclaimed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = LeaseManager(Path(tmp))
+            lock_path = Path(tmp) / "t3.lock"
+            lock_path.write_text("", encoding="utf-8")
+            stale = time.time() - 120
+            os.utime(lock_path, (stale, stale))
+
+            lease = manager.try_acquire(task_id="t3", worker_name="w", owner="o2", lease_seconds=30)
+            self.assertIsNotNone(lease)
+            self.assertEqual(lease.owner, "o2")
+            self.assertEqual(lock_path.read_bytes()[_LEASE_HEADER.size :].split(b"\0"), [b"t3", b"w", b"o2"])
+
+    def test_held_lock_is_not_taken_twice(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = LeaseManager(Path(tmp))
+            self.assertIsNotNone(manager.try_acquire(task_id="t4", worker_name="w", owner="o1", lease_seconds=30))
+            for _ in range(3):
+                self.assertIsNone(manager.try_acquire(task_id="t4", worker_name="w", owner="o2", lease_seconds=30))
+
+            manager.release("t4")
+            self.assertIsNotNone(manager.try_acquire(task_id="t4", worker_name="w", owner="o2", lease_seconds=30))
+
+
+
+@unittest.skipIf(os.name != "posix", "flock leases are POSIX only")
+class FlockLeaseTests(unittest.TestCase):
+    def test_flock_lease_is_exclusive_until_released(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            holder = FlockLeaseManager(Path(tmp))
+            other = FlockLeaseManager(Path(tmp))
+
+            self.assertIsNotNone(holder.try_acquire(task_id="t1", worker_name="w", owner="o1", lease_seconds=30))
+            self.assertIsNone(other.try_acquire(task_id="t1", worker_name="w", owner="o2", lease_seconds=30))
+
+            holder.release("t1")
+            self.assertFalse((Path(tmp) / "t1.lock").exists())
+            self.assertIsNotNone(other.try_acquire(task_id="t1", worker_name="w", owner="o2", lease_seconds=30))
+
+    def test_overdue_flock_lease_is_taken_over(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            holder = FlockLeaseManager(Path(tmp))
+            other = FlockLeaseManager(Path(tmp))
+            holder.try_acquire(task_id="t2", worker_name="w", owner="o1", lease_seconds=30)
+            past = time.time_ns() - 1_000_000_000
+            with open(Path(tmp) / "t2.lock", "r+b") as f:
+                f.write(_LEASE_HEADER.pack(past, past))
+
+            self.assertIsNotNone(other.try_acquire(task_id="t2", worker_name="w", owner="o2", lease_seconds=30))
+            holder.release("t2")
+            self.assertTrue((Path(tmp) / "t2.lock").exists())
+            self.assertIsNone(holder.try_acquire(task_id="t2", worker_name="w", owner="o1", lease_seconds=30))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -88,6 +88,31 @@ class M0WorkerFlowTests(unittest.TestCase):
             emissions = [json.loads(line) for line in f if line.strip()]
         self.assertEqual(len(emissions), 2)
 
+    def test_ingest_counts_repeated_input_rows_as_duplicates(self):
+        with self.input_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "post-1", "occurred_at": "2026-02-06T10:00:00+00:00", "author_handle": "Alice"}) + "\n")
+        store = JsonlStoreAdapter(self.workspace)
+        worker = IngestSocialWorker(store=store)
+
+        result = worker.handle(Task(task_id="ingest", task_type="ingest_social", payload={"input_jsonl_path": str(self.input_path)}))
+
+        self.assertEqual((result.payload["ingested"], result.payload["duplicates"]), (2, 1))
+        self.assertEqual(len(result.payload["signal_ids"]), 3)
+        self.assertEqual(len(store.signals_path.read_text(encoding="utf-8").splitlines()), 2)
+
+    def test_store_dedup_sees_rows_from_other_writers(self):
+        store = JsonlStoreAdapter(self.workspace)
+        self.assertTrue(store.write_signal_if_absent({"id": "sig-1"}))
+        self.assertFalse(store.write_signal_if_absent({"id": "sig-1"}))
+
+        with store.signals_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "sig-2"}) + "\n")
+
+        other = JsonlStoreAdapter(self.workspace)
+        self.assertFalse(other.write_signal_if_absent({"id": "sig-2"}))
+        self.assertTrue(other.write_signal_if_absent({"id": "sig-3"}))
+        self.assertEqual(len(store.signals_path.read_text(encoding="utf-8").splitlines()), 3)
+
     def test_cli_local_m0_command(self):
         from metaspn_ops.cli import main
 
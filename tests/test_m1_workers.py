@@ -73,6 +73,37 @@ class M1WorkerFlowTests(unittest.TestCase):
         self.assertEqual(len(scores), 2)
         self.assertEqual(len(routes), 2)
 
+    def test_store_reads_follow_appends_and_rewrites(self):
+        self.assertEqual(self.store.unresolved_entities(), ["person:alice", "person:bob"])
+
+        with self.store.emissions_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "em_res_3", "emission_type": "entity.resolved", "entity_ref": "person:carol"}) + "\n")
+            f.write(json.dumps({"id": "em_res_4", "emission_type": "entity.resolved", "entity_ref": "person:dave"}))
+        self.assertEqual(
+            self.store.unresolved_entities(),
+            ["person:alice", "person:bob", "person:carol", "person:dave"],
+        )
+
+        self.store.emissions_path.write_text(
+            json.dumps({"id": "em_res_5", "emission_type": "entity.resolved", "entity_ref": "person:erin"}) + "\n",
+            encoding="utf-8",
+        )
+        self.assertEqual(self.store.unresolved_entities(), ["person:erin"])
+
+    def test_bulk_writes_report_duplicates_per_row(self):
+        self.assertTrue(self.store.write_score_if_absent({"id": "s1", "entity_ref": "person:alice"}))
+
+        wrote = self.store.write_scores_if_absent(
+            [
+                {"id": "s1", "entity_ref": "person:alice"},
+                {"id": "s2", "entity_ref": "person:bob"},
+                {"id": "s2", "entity_ref": "person:bob"},
+            ]
+        )
+
+        self.assertEqual(wrote, [False, True, False])
+        self.assertEqual(len(self.store.scores_path.read_text(encoding="utf-8").splitlines()), 2)
+
     def test_local_m1_runner(self):
         summary = run_local_m1(workspace=self.workspace, limit=100)
         self.assertEqual(summary["profile_processed"], 1)
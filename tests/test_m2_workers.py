@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
 
 from metaspn_ops import FilesystemQueue, Task, WorkerRunner
 from metaspn_ops.runner import RunnerConfig
+from metaspn_ops.workers import _jsonl
 from metaspn_ops.workers import ApprovalWorker, DigestWorker, DrafterWorker, M2JsonlStore
 from metaspn_ops.workers.m2 import run_local_m2
 
@@ -95,6 +97,108 @@ class M2WorkerFlowTests(unittest.TestCase):
         self.assertEqual(approvals[0]["decision"], "edit")
         self.assertEqual(approvals[0]["final_body"], "Custom human-approved message.")
 
+    def test_drafter_reports_duplicates_from_batched_write(self):
+        DigestWorker(store=self.store).handle(Task(task_id="d", task_type="digest", payload={"window_key": "w", "top_n": 3}))
+        drafter = DrafterWorker(store=self.store)
+
+        first = drafter.handle(Task(task_id="r1", task_type="draft", payload={"channel": "email"}))
+        second = drafter.handle(Task(task_id="r2", task_type="draft", payload={"channel": "email"}))
+
+        self.assertEqual((first.payload["drafted"], first.payload["duplicates"]), (3, 0))
+        self.assertEqual((second.payload["drafted"], second.payload["duplicates"]), (0, 3))
+        self.assertEqual(first.payload["draft_ids"], second.payload["draft_ids"])
+        self.assertEqual(len(self.store.drafts_path.read_text().splitlines()), 3)
+
+    def test_existing_ids_are_recognised_in_any_row_layout(self):
+        with self.store.drafts_path.open("w", encoding="utf-8") as f:
+            f.write('{"id":"compact","body":"x"}\n')
+            f.write('{"id": "spaced", "body": "x"}\n')
+            f.write('{"body": "x", "id": "later"}\n')
+            f.write('{"id": "quo\\"ted"}\n')
+            f.write('{"id": 7}\n')
+
+        for draft_id in ["compact", "spaced", "later", 'quo"ted', "7"]:
+            self.assertFalse(self.store.write_draft_if_absent({"id": draft_id}), draft_id)
+        self.assertTrue(self.store.write_draft_if_absent({"id": "quo"}))
+
+    def test_id_lookups_follow_appends_partial_rows_and_rewrites(self):
+        self.assertIsNone(self.store.get_digest("d1"))
+        self.store.write_digest_if_absent({"id": "d1", "items": []})
+        self.store.write_digest_if_absent({"id": "d2", "items": []})
+        self.assertEqual(self.store.get_digest("d2")["id"], "d2")
+
+        with self.store.digests_path.open("a", encoding="utf-8") as f:
+            f.write('{"id": "d3", "items": []}')
+        self.assertEqual(self.store.get_digest("d3")["id"], "d3")
+        self.assertEqual(self.store.get_digest("d1")["id"], "d1")
+
+        self.store.digests_path.write_text('{"id": "d9", "items": []}\n')
+        self.assertIsNone(self.store.get_digest("d1"))
+        self.assertEqual(self.store.get_digest("d9")["id"], "d9")
+
+    def test_lookups_reread_a_store_file_replaced_by_a_larger_one(self):
+        self.store.write_digest_if_absent({"id": "d1", "items": []})
+        self.assertEqual(self.store.get_digest("d1")["id"], "d1")
+        self.assertFalse(self.store.write_digest_if_absent({"id": "d1", "items": []}))
+
+        replacement = self.store.digests_path.with_suffix(".tmp")
+        replacement.write_text('{"id": "n1", "items": [1, 2, 3]}\n{"id": "n2", "items": []}\n')
+        os.replace(replacement, self.store.digests_path)
+
+        self.assertIsNone(self.store.get_digest("d1"))
+        self.assertEqual(self.store.get_digest("n1")["items"], [1, 2, 3])
+        self.assertFalse(self.store.write_digest_if_absent({"id": "n2", "items": []}))
+        self.assertTrue(self.store.write_digest_if_absent({"id": "d1", "items": []}))
+
+    def test_appends_after_an_unterminated_last_row(self):
+        self.store.write_digest_if_absent({"id": "d1", "items": []})
+        with self.store.digests_path.open("a", encoding="utf-8") as f:
+            f.write('{"id": "d2", "items": []}')
+
+        self.assertFalse(self.store.write_digest_if_absent({"id": "d2", "items": []}))
+        self.assertTrue(self.store.write_digest_if_absent({"id": "d3", "items": []}))
+        rows = [json.loads(line) for line in self.store.digests_path.read_text().splitlines()]
+        self.assertEqual([row["id"] for row in rows], ["d1", "d2", "d3"])
+
+    def test_getters_return_copies_of_cached_rows(self):
+        self.store.write_digest_if_absent({"id": "d1", "items": [{"rank": 1}]})
+
+        self.store.get_digest("d1")["items"][0]["rank"] = 9
+        self.store.latest_digest()["items"].append({"rank": 2})
+        self.store.recommendation_candidates()[0]["score"] = 0
+
+        self.assertEqual(self.store.get_digest("d1"), {"id": "d1", "items": [{"rank": 1}]})
+        self.assertEqual(self.store.latest_digest(), {"id": "d1", "items": [{"rank": 1}]})
+        self.assertEqual(self.store.recommendation_candidates()[0]["score"], 92)
+        self.assertEqual(M2JsonlStore(self.workspace).recommendation_candidates()[0]["score"], 92)
+
+    def test_append_descriptors_are_only_kept_when_asked(self):
+        def open_fds():
+            return len(os.listdir("/proc/self/fd"))
+
+        before = open_fds()
+        for i in range(3):
+            M2JsonlStore(self.workspace).write_digest_if_absent({"id": f"plain{i}", "items": []})
+        self.assertEqual(open_fds(), before)
+
+        with M2JsonlStore(self.workspace, keep_fds=True) as store:
+            store.write_digest_if_absent({"id": "kept", "items": []})
+            self.assertEqual(open_fds(), before + 1)
+        self.assertEqual(open_fds(), before)
+
+    def test_file_caches_keep_a_bounded_number_of_paths(self):
+        paths = [self.workspace / f"f{i}.jsonl" for i in range(_jsonl._CACHED_PATHS + 8)]
+        for path in paths:
+            _jsonl.append_if_absent(path, "a", {"id": "a"})
+            self.assertEqual(_jsonl.read_rows(path), [{"id": "a"}])
+
+        self.assertLessEqual(len(_jsonl._id_cache), _jsonl._CACHED_PATHS)
+        self.assertLessEqual(len(_jsonl._row_cache), _jsonl._CACHED_PATHS)
+        self.assertNotIn(paths[0], _jsonl._row_cache)
+        self.assertIn(paths[-1], _jsonl._row_cache)
+        self.assertFalse(_jsonl.append_if_absent(paths[0], "a", {"id": "a"}))
+        self.assertEqual(_jsonl.read_rows(paths[0]), [{"id": "a"}])
+
     def test_m2_cli_local_runner(self):
         summary = run_local_m2(
             workspace=self.workspace,
@@ -4,6 +4,7 @@ import json
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from metaspn_ops import FilesystemQueue, Task, WorkerRunner
 from metaspn_ops.runner import RunnerConfig
@@ -136,6 +137,75 @@ class M3WorkerFlowTests(unittest.TestCase):
         self.assertEqual(reviews[0]["decision"], "approve")
         self.assertIsNotNone(reviews[0]["adopted_policy"])
 
+    def test_evaluator_matches_first_outcome_inside_the_success_window(self):
+        outcomes = [
+            {"id": "out-early", "entity_ref": "person:bob", "occurred_at": "2026-02-01T10:59:00+00:00"},
+            {"id": "out-late", "entity_ref": "person:bob", "occurred_at": "2026-02-01T15:00:00Z"},
+            {"id": "out-first", "entity_ref": "person:bob", "occurred_at": "2026-02-01T13:00:00+00:00"},
+        ]
+        with self.store.outcomes_path.open("a", encoding="utf-8") as f:
+            for row in outcomes:
+                f.write(json.dumps(row) + "\n")
+
+        task = Task(
+            task_id="e",
+            task_type="evaluate",
+            payload={"window_start": "2026-02-01T00:00:00+00:00", "window_end": "2026-02-03T00:00:00+00:00", "success_within_hours": 3},
+        )
+        result = OutcomeEvaluatorWorker(store=self.store).handle(task)
+
+        self.assertEqual((result.payload["successes"], result.payload["failures"]), (1, 1))
+        matched = {row["attempt_id"]: row["matched_outcome_id"] for row in map(json.loads, self.store.evaluations_path.read_text().splitlines())}
+        self.assertEqual(matched, {"att-1": None, "att-2": "out-first"})
+
+    def test_store_reuses_append_descriptor_until_file_is_replaced(self):
+        self.store = M3JsonlStore(self.workspace, keep_fds=True)
+        self.assertTrue(self.store.write_failure_if_absent({"id": "f1"}))
+        fd = self.store._append_fds[self.store.failures_path][0]
+        self.assertTrue(self.store.write_failure_if_absent({"id": "f2"}))
+        self.assertEqual(self.store._append_fds[self.store.failures_path][0], fd)
+
+        self.store.failures_path.unlink()
+        self.assertTrue(self.store.write_failure_if_absent({"id": "f3"}))
+        self.assertEqual(self.store.failures_path.read_text(), '{"id":"f3"}\n')
+
+        self.store.close()
+        self.assertEqual(self.store._append_fds, {})
+        self.assertFalse(self.store.write_failure_if_absent({"id": "f3"}))
+
+    def test_attempt_windows_follow_appends_out_of_order_rows_and_rewrites(self):
+        def window(start, end):
+            rows = self.store.attempts_in_window(window_start=f"2026-02-0{start}T00:00:00+00:00", window_end=f"2026-02-0{end}T00:00:00+00:00")
+            return [row["id"] for row in rows]
+
+        def append(*rows):
+            with self.store.attempts_path.open("a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+
+        self.assertEqual(window(1, 2), ["att-1", "att-2"])
+        append({"id": "att-3", "occurred_at": "2026-02-03T10:00:00+00:00"})
+        self.assertEqual(window(2, 4), ["att-3"])
+        append({"id": "att-0", "occurred_at": "2026-01-31T10:00:00Z"})
+        self.assertEqual(window(1, 4), ["att-1", "att-2", "att-3"])
+        self.assertEqual(self.store.attempts_in_window(window_start="2026-01-31T00:00:00+00:00", window_end="2026-02-01T10:00:00+00:00")[0]["id"], "att-0")
+
+        self.store.attempts_path.write_text(json.dumps({"id": "att-9", "occurred_at": "2026-02-05T00:00:00+00:00"}) + "\n")
+        self.assertEqual(window(1, 6), ["att-9"])
+
+    def test_durable_store_fsyncs_each_batch_and_new_files_directory(self):
+        store = M3JsonlStore(self.workspace, durable=True)
+        with mock.patch("metaspn_ops.workers._jsonl.os.fsync") as fsync, mock.patch(
+            "metaspn_ops.workers._jsonl._fsync_dir"
+        ) as fsync_dir:
+            store.write_failures_if_absent([{"id": "f1"}, {"id": "f2"}])
+            store.write_failure_if_absent({"id": "f3"})
+            store.write_failure_if_absent({"id": "f3"})
+        store.close()
+
+        self.assertEqual(fsync.call_count, 2)
+        fsync_dir.assert_called_once_with(store.store_dir)
+
     def test_m3_local_runner(self):
         summary = run_local_m3(
             workspace=self.workspace,
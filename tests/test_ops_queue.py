@@ -1,14 +1,51 @@
 from __future__ import annotations
 
+import contextlib
+import io
 import json
+import math
+import os
 import tempfile
 import threading
 import time
 import unittest
+import zlib
+from unittest import mock
 from datetime import datetime, timedelta, timezone
 
+from metaspn_ops import _json
+from metaspn_ops.cli import _fast_queue_stats_args, _parse_every, build_parser, main
 from metaspn_ops.fs_queue import FilesystemQueue
-from metaspn_ops.types import Result, Task
+from metaspn_ops.runner import RunnerConfig, WorkerRunner
+from metaspn_ops.types import Result, RunRecord, Task, utc_now_iso
+
+
+class _MinimalQueue:
+    # Only the original QueueBackend methods; optional ones are left out.
+    def __init__(self, inner):
+        self.inner = inner
+        self.worker_name = inner.worker_name
+
+    def enqueue_task(self, task, *, scheduled_for=None):
+        return self.inner.enqueue_task(task, scheduled_for=scheduled_for)
+
+    def lease_next_task(self, *, owner, lease_seconds):
+        return self.inner.lease_next_task(owner=owner, lease_seconds=lease_seconds)
+
+    def ack_task(self, leased_path):
+        self.inner.ack_task(leased_path)
+
+    def fail_task(self, leased_path, task, error):
+        self.inner.fail_task(leased_path, task, error)
+
+    def write_result(self, result):
+        return self.inner.write_result(result)
+
+    def write_run_record(self, record):
+        return self.inner.write_run_record(record)
+
+    def stats(self):
+        return self.inner.stats()
 
 
 class FilesystemQueueTests(unittest.TestCase):
@@ -39,6 +76,17 @@ class FilesystemQueueTests(unittest.TestCase):
 
         self.assertEqual(sum(1 for x in got if x), 1)
 
+    def test_flock_leases_drive_the_queue(self):
+        queue = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich", flock_leases=True)
+        queue.enqueue_task(Task(task_id="f1", task_type="enrich", payload={}))
+
+        leased_task, leased_path = queue.lease_next_task(owner="a", lease_seconds=30)
+        self.assertIsNone(queue.lease_next_task(owner="b", lease_seconds=30))
+        queue.ack_task(leased_path)
+
+        self.assertEqual(leased_task.task_id, "f1")
+        self.assertEqual((queue.stats()["inbox"], queue.stats()["locks"]), (0, 0))
+
     def test_lease_expiration_behavior(self):
         task = Task(task_id="t-lease", task_type="enrich", payload={})
         self.queue.enqueue_task(task)
@@ -81,6 +129,152 @@ class FilesystemQueueTests(unittest.TestCase):
         dead = list(self.queue.deadletter_dir.glob("*.json"))
         self.assertEqual(len(dead), 1)
 
+    def test_retry_deadletter_by_task_id(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset, task_id in enumerate(("x1", "ax1", "other")):
+            task = Task(task_id=task_id, task_type="enrich", payload={}, max_attempts=1)
+            self.queue.enqueue_task(task, scheduled_for=base + timedelta(seconds=offset))
+        for _ in range(3):
+            leased_task, leased_path = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+            self.queue.fail_task(leased_path, leased_task, "permanent")
+
+        self.assertEqual(self.queue.retry_deadletter(task_id="x1"), 1)
+        self.assertEqual(self.queue.stats()["deadletter"], 2)
+        leased_task, _ = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        self.assertEqual((leased_task.task_id, leased_task.attempt_count), ("x1", 0))
+
+        self.assertEqual(self.queue.retry_deadletter(), 2)
+        self.assertEqual(self.queue.stats()["deadletter"], 0)
+
+    def test_retry_deadletter_requeues_a_task_deadlettered_twice(self):
+        for attempt in range(2):
+            self.queue.enqueue_task(Task(task_id="dup", task_type="enrich", payload={"n": attempt}, max_attempts=1))
+            leased_task, leased_path = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+            self.queue.fail_task(leased_path, leased_task, "permanent")
+            if attempt == 0:
+                first = next(self.queue.deadletter_dir.glob("*.json"))
+                first.rename(first.with_name("2000-01-01T000000Z__t_dup.json"))
+
+        self.assertEqual(self.queue.retry_deadletter(task_id="dup"), 2)
+        self.assertEqual(self.queue.stats()["deadletter"], 0)
+        leased_task, _ = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        self.assertEqual((leased_task.task_id, leased_task.payload), ("dup", {"n": 1}))
+        self.assertIsNone(self.queue.lease_next_task(owner="other", lease_seconds=10))
+
+    def test_lease_is_keyed_by_file_name(self):
+        self.queue.enqueue_task(Task(task_id="feed/item:1", task_type="enrich", payload={}))
+
+        leased_task, leased_path = self.queue.lease_next_task(owner="a", lease_seconds=30)
+        self.assertEqual(leased_task.task_id, "feed/item:1")
+        self.assertTrue((self.queue.lock_dir / "feed%2Fitem%3A1.lock").exists())
+        self.assertIsNone(self.queue.lease_next_task(owner="b", lease_seconds=30))
+
+        self.queue.ack_task(leased_path)
+        self.assertEqual(list(self.queue.lock_dir.glob("*.lock")), [])
+
+    def test_one_lease_per_task_id_across_inbox_files(self):
+        now = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset in range(2):
+            self.queue.enqueue_task(Task(task_id="twice", task_type="x", payload={"n": offset}), scheduled_for=now + timedelta(seconds=offset))
+        self.assertEqual(len(list(self.queue.inbox_dir.glob("*.json"))), 2)
+
+        first, first_path = self.queue.lease_next_task(owner="a", lease_seconds=30)
+        self.assertIsNone(self.queue.lease_next_task(owner="b", lease_seconds=30))
+        self.assertTrue((self.queue.lock_dir / "twice.lock").exists())
+
+        self.queue.ack_task(first_path)
+        second, _ = self.queue.lease_next_task(owner="b", lease_seconds=30)
+        self.assertEqual((first.payload, second.payload), ({"n": 0}, {"n": 1}))
+
+    def test_ids_with_the_same_safe_id_get_separate_leases(self):
+        for shard_inbox in (False, True):
+            with self.subTest(shard_inbox=shard_inbox):
+                queue = FilesystemQueue(workspace=self.tmp.name, worker_name=f"w{shard_inbox}", shard_inbox=shard_inbox)
+                now = datetime.now(timezone.utc) - timedelta(minutes=1)
+                queue.enqueue_task(Task(task_id="a/b", task_type="x", payload={}), scheduled_for=now)
+                queue.enqueue_task(Task(task_id="a_b", task_type="x", payload={}), scheduled_for=now + timedelta(seconds=1))
+                queue.enqueue_task(Task(task_id="a:b", task_type="x", payload={}), scheduled_for=now + timedelta(seconds=2))
+
+                leased = [queue.lease_next_task(owner=owner, lease_seconds=30) for owner in "abc"]
+                self.assertEqual([t.task_id for t, _ in leased], ["a/b", "a_b", "a:b"])
+                # Ids that are valid file names keep the <task_id>.lock name of earlier releases.
+                self.assertTrue((queue.lock_dir / "a:b.lock").exists())
+
+                for _, path in leased:
+                    queue.ack_task(path)
+                self.assertEqual(queue.stats()["locks"], 0)
+
+    def test_durable_enqueue_tasks_fsyncs_each_folder_once(self):
+        queue = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich", shard_inbox=True)
+        tasks = [Task(task_id=f"d{i}", task_type="x", payload={}) for i in range(6)]
+        with mock.patch("metaspn_ops.fs_queue._fsync_dir") as fsync_dir:
+            paths = queue.enqueue_tasks(tasks, durable=True)
+
+        folders = sorted(call.args[0] for call in fsync_dir.call_args_list)
+        self.assertEqual(folders, sorted({p.parent for p in paths}))
+        self.assertEqual(queue.stats()["inbox"], 6)
+
+    def test_rescan_merges_external_changes_into_ready_index(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        producer = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich")
+        producer.enqueue_task(Task(task_id="b", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=2))
+        gone = producer.enqueue_task(Task(task_id="c", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=3))
+        self.assertEqual(self.queue.stats()["inbox"], 2)
+
+        gone.unlink()
+        producer.enqueue_task(Task(task_id="a", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=1))
+
+        leased = self.queue.lease_next_tasks(owner="r1", lease_seconds=20, n=5)
+        self.assertEqual([t.task_id for t, _ in leased], ["a", "b"])
+
+    def test_lease_next_tasks_takes_a_batch_in_order(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset, task_id in enumerate(["a", "b", "c", "d"]):
+            self.queue.enqueue_task(Task(task_id=task_id, task_type="x", payload={}), scheduled_for=base + timedelta(seconds=offset))
+
+        first = self.queue.lease_next_tasks(owner="r1", lease_seconds=20, n=3)
+        second = self.queue.lease_next_tasks(owner="r2", lease_seconds=20, n=3)
+
+        self.assertEqual([t.task_id for t, _ in first], ["a", "b", "c"])
+        self.assertEqual([t.task_id for t, _ in second], ["d"])
+        self.assertEqual(self.queue.lease_next_tasks(owner="r3", lease_seconds=20, n=3), [])
+
+    def test_lease_partitions_prefer_own_tasks_then_steal(self):
+        queue = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich", lease_partitions=2)
+        part = lambda text: zlib.crc32(text.encode("utf-8")) % 2
+        owner = next(f"runner-{i}" for i in range(100) if part(f"runner-{i}") == 0)
+        theirs = [f"t{i}" for i in range(100) if part(f"t{i}")][:2]
+        ours = next(f"t{i}" for i in range(100) if not part(f"t{i}"))
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset, task_id in enumerate([theirs[0], ours, theirs[1]]):
+            queue.enqueue_task(Task(task_id=task_id, task_type="x", payload={}), scheduled_for=base + timedelta(seconds=offset))
+
+        first = queue.lease_next_tasks(owner=owner, lease_seconds=20, n=1)
+        rest = queue.lease_next_tasks(owner=owner, lease_seconds=20, n=5)
+
+        self.assertEqual([t.task_id for t, _ in first], [ours])
+        self.assertEqual([t.task_id for t, _ in rest], theirs)
+
+    def test_finalize_task_writes_result_and_run_then_acks(self):
+        self.queue.enqueue_task(Task(task_id="fin", task_type="x", payload={}))
+        leased_task, leased_path = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        record = RunRecord(
+            run_id="run-fin",
+            worker_name="enrich",
+            task_id="fin",
+            started_at="2026-01-01T00:00:00+00:00",
+            finished_at="2026-01-01T00:00:01+00:00",
+            duration_ms=1000,
+            status="ok",
+            error=None,
+            trace_context={},
+        )
+
+        self.queue.finalize_task(leased_path, Result(task_id="fin", status="ok"), record)
+
+        stats = self.queue.stats()
+        self.assertEqual((stats["inbox"], stats["outbox"], stats["runs"], stats["locks"]), (0, 1, 1, 0))
+
     def test_deterministic_ordering(self):
         base = datetime.now(timezone.utc) - timedelta(minutes=1)
         self.queue.enqueue_task(Task(task_id="c", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=3))
@@ -97,12 +291,300 @@ class FilesystemQueueTests(unittest.TestCase):
 
         self.assertEqual(leased_ids, sorted(leased_ids))
 
+    def test_enqueue_tasks_batch(self):
+        tasks = [Task(task_id=f"b{i}", task_type="x", payload={"i": i}) for i in range(5)]
+        paths = self.queue.enqueue_tasks(tasks)
+
+        self.assertEqual(len(paths), 5)
+        self.assertEqual(sorted(self.queue.inbox_dir.glob("*.json")), sorted(paths))
+        self.assertEqual(list(self.queue.inbox_dir.glob("*.tmp")), [])
+
+        leased_ids = []
+        while (leased := self.queue.lease_next_task(owner="runner", lease_seconds=20)) is not None:
+            t, p = leased
+            leased_ids.append(t.task_id)
+            self.queue.ack_task(p)
+        self.assertEqual(leased_ids, [f"b{i}" for i in range(5)])
+
+    def test_enqueue_tasks_batch_with_duplicate_ids_keeps_the_last(self):
+        tasks = [Task(task_id=task_id, task_type="x", payload={"i": i}) for i, task_id in enumerate("aba")]
+        paths = self.queue.enqueue_tasks(tasks)
+
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(sorted(self.queue.inbox_dir.glob("*.json")), sorted(paths))
+        self.assertEqual(list(self.queue.inbox_dir.glob(".*.tmp")), [])
+        leased = self.queue.lease_next_tasks(owner="runner", lease_seconds=20, n=5)
+        self.assertEqual(sorted((t.task_id, t.payload["i"]) for t, _ in leased), [("a", 2), ("b", 1)])
+
+    def test_lease_sees_tasks_from_other_queue_instances(self):
+        self.assertIsNone(self.queue.lease_next_task(owner="runner", lease_seconds=20))
+
+        producer = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich")
+        producer.enqueue_task(Task(task_id="external", task_type="x", payload={}))
+
+        leased = self.queue.lease_next_task(owner="runner", lease_seconds=20)
+        self.assertIsNotNone(leased)
+        self.assertEqual(leased[0].task_id, "external")
+
+    def test_stats_counts_queue_folders(self):
+        self.queue.enqueue_tasks([Task(task_id=f"s{i}", task_type="x", payload={}) for i in range(3)])
+        leased = self.queue.lease_next_task(owner="runner", lease_seconds=20)
+        self.queue.write_result(Result(task_id=leased[0].task_id, status="ok"))
+
+        self.assertEqual(
+            self.queue.stats(),
+            {"inbox": 3, "outbox": 1, "runs": 0, "deadletter": 0, "locks": 1},
+        )
+
+    def test_stats_reuses_counts_until_folder_changes(self):
+        for i in range(3):
+            self.queue.write_result(Result(task_id=f"r{i}", status="ok"))
+        settled = time.time() - 60
+        os.utime(self.queue.outbox_dir, (settled, settled))
+        self.assertEqual(self.queue.stats()["outbox"], 3)
+
+        self.assertTrue(self.queue.counters_path.exists())
+
+        # A new queue (as in each `metaspn queue stats` process) reuses the
+        # shared counts while the folder is unchanged.
+        (self.queue.outbox_dir / "unseen.json").write_bytes(b"{}")
+        os.utime(self.queue.outbox_dir, (settled, settled))
+        other = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich")
+        self.assertEqual(other.stats()["outbox"], 3)
+
+        other.write_result(Result(task_id="r3", status="ok"))
+        self.assertEqual(self.queue.stats()["outbox"], 5)
+
+    def test_stats_without_a_writable_counters_folder(self):
+        self.queue.write_result(Result(task_id="r0", status="ok"))
+        settled = time.time() - 60
+        os.utime(self.queue.outbox_dir, (settled, settled))
+        self.queue.counters_path.parent.rmdir()
+        before = sorted(os.walk(self.tmp.name))
+
+        self.assertEqual(self.queue.stats()["outbox"], 1)
+        self.assertEqual(sorted(os.walk(self.tmp.name)), before)
+
+        # A read-only workspace: the counters file cannot be published.
+        self.queue.counters_path.parent.mkdir()
+        self.queue.write_result(Result(task_id="r1", status="ok"))
+        with mock.patch("metaspn_ops.fs_queue._publish_bytes", side_effect=PermissionError) as publish:
+            self.assertEqual(self.queue.stats()["outbox"], 2)
+        self.assertTrue(publish.called)
+        self.assertFalse(self.queue.counters_path.exists())
+
+    def test_sharded_inbox_is_leased_in_schedule_order(self):
+        producer = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich", shard_inbox=True)
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for task_id, offset in [("late", 3), ("early", 1), ("middle", 2)]:
+            producer.enqueue_task(
+                Task(task_id=task_id, task_type="x", payload={}),
+                scheduled_for=base + timedelta(seconds=offset),
+            )
+
+        self.assertEqual(list(self.queue.inbox_dir.glob("*.json")), [])
+        self.assertEqual(len(list(self.queue.inbox_dir.glob("*/*.json"))), 3)
+        self.assertEqual(self.queue.stats()["inbox"], 3)
+
+        leased_ids = []
+        for _ in range(3):
+            t, p = self.queue.lease_next_task(owner="runner", lease_seconds=20)
+            leased_ids.append(t.task_id)
+            self.queue.ack_task(p)
+        self.assertEqual(leased_ids, ["early", "middle", "late"])
+        self.assertEqual(self.queue.stats()["inbox"], 0)
+
+    def test_single_threaded_queue_with_inline_runner(self):
+        class Echo:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok", payload=task.payload)
+
+        queue = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich", thread_safe=False)
+        queue.enqueue_tasks([Task(task_id=f"s{i}", task_type="x", payload={"i": i}) for i in range(4)])
+
+        processed = WorkerRunner(queue=queue, worker=Echo(), config=RunnerConfig(once=True, max_tasks=10)).run()
+
+        self.assertEqual(processed, 4)
+        stats = queue.stats()
+        self.assertEqual((stats["inbox"], stats["outbox"], stats["runs"], stats["locks"]), (0, 4, 4, 0))
+
+    def test_runner_falls_back_without_finalize_task(self):
+        class Echo:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok", payload=task.payload)
+
+        queue = _MinimalQueue(self.queue)
+        for i in range(3):
+            queue.enqueue_task(Task(task_id=f"m{i}", task_type="x", payload={}))
+
+        processed = WorkerRunner(queue=queue, worker=Echo(), config=RunnerConfig(once=True, max_tasks=10)).run()
+
+        self.assertEqual(processed, 3)
+        stats = self.queue.stats()
+        self.assertEqual((stats["inbox"], stats["outbox"], stats["runs"], stats["locks"]), (0, 3, 3, 0))
+
+    def test_parallel_runner_falls_back_without_lease_next_tasks(self):
+        class Echo:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok", payload=task.payload)
+
+        queue = _MinimalQueue(self.queue)
+        for i in range(5):
+            queue.enqueue_task(Task(task_id=f"q{i}", task_type="x", payload={}))
+
+        with WorkerRunner(queue=queue, worker=Echo(), config=RunnerConfig(once=True, max_tasks=4, parallel=2)) as runner:
+            self.assertEqual(runner.run(), 4)
+            self.assertEqual(runner.run(), 1)
+        self.assertEqual(self.queue.stats()["outbox"], 5)
+
+    def test_runner_reuses_its_pool_across_batches(self):
+        class Echo:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok", payload=task.payload)
+
+        with WorkerRunner(queue=self.queue, worker=Echo(), config=RunnerConfig(once=True, max_tasks=2, parallel=2)) as runner:
+            for i in range(4):
+                self.queue.enqueue_task(Task(task_id=f"p{i}", task_type="x", payload={}))
+            self.assertEqual(runner.run(), 2)
+            pool = runner._pool
+            self.assertEqual(runner.run(), 2)
+            self.assertIs(runner._pool, pool)
+        self.assertIsNone(runner._pool)
+        self.assertEqual(self.queue.stats()["outbox"], 4)
+
+    def test_parallel_runner_handles_a_lone_task_inline(self):
+        class ThreadEcho:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok", payload={"thread": threading.current_thread().name})
+
+        self.queue.enqueue_task(Task(task_id="solo", task_type="x", payload={}))
+        with WorkerRunner(queue=self.queue, worker=ThreadEcho(), config=RunnerConfig(once=True, max_tasks=4, parallel=4)) as runner:
+            self.assertEqual(runner.run(), 1)
+            self.assertIsNone(runner._pool)
+
+        result = json.loads(next(self.queue.outbox_dir.glob("*.json")).read_text(encoding="utf-8"))
+        self.assertEqual(result["payload"]["thread"], threading.current_thread().name)
+
+    def test_idle_polling_backs_off_and_resets_on_work(self):
+        class Echo:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok")
+
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 4:
+                self.queue.enqueue_task(Task(task_id="wake", task_type="x", payload={}))
+            if len(sleeps) == 6:
+                raise KeyboardInterrupt
+
+        config = RunnerConfig(poll_interval_seconds=0.5, max_poll_interval_seconds=3)
+        with mock.patch("metaspn_ops.runner.time.sleep", side_effect=fake_sleep):
+            with self.assertRaises(KeyboardInterrupt):
+                WorkerRunner(queue=self.queue, worker=Echo(), config=config).run()
+
+        self.assertEqual(sleeps, [0.5, 1.0, 2.0, 3, 0.5, 1.0])
+
+    def test_background_writes_are_visible_after_flush(self):
+        class Echo:
+            name = "enrich"
+
+            def handle(self, task):
+                return Result(task_id=task.task_id, status="ok", payload=task.payload)
+
+        queue = FilesystemQueue(workspace=self.tmp.name, worker_name="enrich", background_writes=True)
+        for i in range(5):
+            queue.enqueue_task(Task(task_id=f"bg{i}", task_type="x", payload={"i": i}))
+
+        processed = WorkerRunner(queue=queue, worker=Echo(), config=RunnerConfig(once=True, max_tasks=10)).run()
+
+        self.assertEqual(processed, 5)
+        outputs = sorted(json.loads(p.read_text())["payload"]["i"] for p in queue.outbox_dir.glob("*.json"))
+        self.assertEqual(outputs, [0, 1, 2, 3, 4])
+        self.assertEqual(len(list(queue.runs_dir.glob("*.json"))), 5)
+
+    def test_queue_stats_fast_path_matches_parser(self):
+        self.queue.enqueue_task(Task(task_id="cli", task_type="enrich", payload={}))
+        argv = ["queue", "stats", "enrich", f"--workspace={self.tmp.name}", "--backend", "fs"]
+
+        fast = _fast_queue_stats_args(argv)
+        self.assertEqual(vars(fast), vars(build_parser().parse_args(argv)))
+        self.assertIsNone(_fast_queue_stats_args(["queue", "stats", "--help"]))
+        self.assertIsNone(_fast_queue_stats_args(["queue", "stats", "enrich", "--workspace"]))
+        self.assertIsNone(_fast_queue_stats_args(["queue", "stats", "enrich", "--backend", "redis"]))
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(argv), 0)
+        self.assertEqual(json.loads(out.getvalue())["inbox"], 1)
+
+    def test_parse_every_units(self):
+        self.assertEqual(
+            [_parse_every(raw) for raw in ("30", "30s", "2m", "1H", "1500ms", "10ms", None)],
+            [30, 30, 120, 3600, 1, 1, None],
+        )
+        with self.assertRaises(ValueError):
+            _parse_every("5d")
+
+    def test_enqueue_task_async_resolves_to_inbox_path(self):
+        futures = [
+            self.queue.enqueue_task_async(Task(task_id=f"a{i}", task_type="x", payload={"i": i}))
+            for i in range(4)
+        ]
+
+        paths = [future.result() for future in futures]
+        self.assertTrue(all(path.parent == self.queue.inbox_dir and path.exists() for path in paths))
+        leased_task, _ = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        self.assertEqual(leased_task.task_id, "a0")
+
+    def test_utc_now_iso_matches_datetime_isoformat(self):
+        for ns in (1_770_000_000_123_456_789, 1_770_000_001_000_000_000):
+            with mock.patch("metaspn_ops.types.time.time_ns", return_value=ns):
+                expected = datetime.fromtimestamp(ns // 1000 / 1_000_000, timezone.utc).isoformat()
+                self.assertEqual(utc_now_iso(), expected)
+
     def test_results_roundtrip_json(self):
         path = self.queue.write_result(Result(task_id="t1", status="ok", payload={"x": 1}))
         data = json.loads(path.read_text())
         self.assertEqual(data["task_id"], "t1")
         self.assertEqual(data["payload"]["x"], 1)
 
+    def test_queue_files_store_unicode_as_utf8(self):
+        payload = {"name": "Zoë", "text": "東京 ☕"}
+        self.queue.enqueue_task(Task(task_id="u1", task_type="enrich", payload=payload))
+        path = self.queue.write_result(Result(task_id="u1", status="ok", payload=payload))
+
+        self.assertIn("東京 ☕".encode("utf-8"), path.read_bytes())
+        self.assertEqual(json.loads(path.read_text(encoding="utf-8"))["payload"], payload)
+        leased_task, _ = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        self.assertEqual(leased_task.payload, payload)
+
+    def test_queue_files_accept_everything_stdlib_json_does(self):
+        cases = [{1: "int key", None: "none key"}, {"big": 2**70}, {"text": "lone \ud800"}, {"x": float("inf")}]
+        for i, payload in enumerate(cases):
+            with self.subTest(payload=payload):
+                self.queue.enqueue_task(Task(task_id=f"j{i}", task_type="enrich", payload=payload))
+                leased_task, leased_path = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+                self.assertEqual(leased_task.payload, json.loads(json.dumps(payload)))
+                self.queue.ack_task(leased_path)
+
+        nan_task = Task(task_id="nan", task_type="enrich", payload={"x": float("nan")})
+        self.assertIn(b"NaN", nan_task.to_json_bytes())
+        self.assertTrue(math.isnan(Task.from_dict(_json.loads(nan_task.to_json_bytes())).payload["x"]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import subprocess
+import sys
 import unittest
+from pathlib import Path
 
 import metaspn_ops
 
@@ -10,6 +13,20 @@ class PublicApiTests(unittest.TestCase):
         self.assertFalse(hasattr(metaspn_ops, "SQLiteQueueStub"))
         self.assertNotIn("SQLiteQueueStub", getattr(metaspn_ops, "__all__", []))
 
+    def test_worker_exports_resolve_lazily(self):
+        for name in metaspn_ops.__all__:
+            self.assertTrue(hasattr(metaspn_ops, name), name)
+
+        probe = "import sys, metaspn_ops.cli; print('metaspn_ops.workers' in sys.modules)"
+        out = subprocess.run(
+            [sys.executable, "-c", probe],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={"PYTHONPATH": str(Path(metaspn_ops.__file__).resolve().parents[1])},
+        )
+        self.assertEqual(out.stdout.strip(), "False")
+
 
 if __name__ == "__main__":
     unittest.main()
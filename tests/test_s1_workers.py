@@ -96,6 +96,69 @@ class S1WorkerFlowTests(unittest.TestCase):
         self.assertEqual(len(summaries), 1)
         self.assertEqual(summaries[0]["season_date"], self.date_key)
 
+    def test_writes_dedup_against_rows_from_other_writers(self):
+        self.assertTrue(self.store.write_summary_if_absent({"id": "sum-1", "note": "ünïcode"}))
+        with self.store.summaries_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "sum-2"}) + "\n")
+
+        other = S1JsonlStore(self.workspace)
+        self.assertFalse(other.write_summary_if_absent({"id": "sum-1"}))
+        self.assertFalse(self.store.write_summary_if_absent({"id": "sum-2"}))
+        self.assertIn("ünïcode", self.store.summaries_path.read_text(encoding="utf-8"))
+
+    def test_queries_return_copies_of_cached_rows(self):
+        self.store.write_attention_if_absent({"id": "a1", "season_date": "d1", "subject_ref": "s1", "parts": {"x": 1}})
+
+        self.store.attention_for_date("d1")[0]["parts"]["x"] = 2
+        self.store.scored_entities()[0]["entity_ref"] = "changed"
+
+        self.assertEqual(S1JsonlStore(self.workspace).attention_for_date("d1")[0]["parts"], {"x": 1})
+        self.assertNotEqual(self.store.scored_entities()[0]["entity_ref"], "changed")
+
+    def test_date_queries_follow_appends_and_rewrites(self):
+        self.store.write_attention_if_absent({"id": "a1", "season_date": "d1", "subject_ref": "s2"})
+        self.store.write_attention_if_absent({"id": "a2", "season_date": "d2", "subject_ref": "s1"})
+        self.assertEqual([r["id"] for r in self.store.attention_for_date("d1")], ["a1"])
+
+        self.store.write_attention_if_absent({"id": "a3", "season_date": "d1", "subject_ref": "s1"})
+        with self.store.attention_scores_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "a4", "season_date": "d1", "subject_ref": "s3"}))
+        self.assertEqual([r["id"] for r in self.store.attention_for_date("d1")], ["a3", "a1", "a4"])
+
+        self.store.attention_scores_path.write_text(json.dumps({"id": "a9", "season_date": "d2"}) + "\n")
+        self.assertEqual(self.store.attention_for_date("d1"), [])
+        self.assertEqual([r["id"] for r in self.store.attention_for_date("d2")], ["a9"])
+
+    def test_date_queries_keep_one_sorted_entry_per_file(self):
+        for day in range(20):
+            self.store.write_attention_if_absent({"id": f"a{day}", "season_date": f"d{day}", "subject_ref": "s"})
+            self.assertEqual([r["id"] for r in self.store.attention_for_date(f"d{day}")], [f"a{day}"])
+            self.assertEqual([r["id"] for r in self.store.attention_for_date("d0")], ["a0"])
+
+        self.assertEqual(len(self.store._sorted_cache), 1)
+
+    def test_batched_attention_writes_report_duplicates(self):
+        update = UpdateAttentionScoresWorker(store=self.store)
+        task = Task(task_id="u", task_type="update", payload={"date": self.date_key})
+
+        first = update.handle(task).payload
+        second = update.handle(task).payload
+
+        self.assertEqual((first["updated"], first["duplicates"]), (2, 0))
+        self.assertEqual((second["updated"], second["duplicates"]), (0, 2))
+        self.assertEqual(first["attention_ids"], second["attention_ids"])
+
+    def test_scored_entities_stay_ordered_as_scores_are_appended(self):
+        self.assertEqual([r["id"] for r in self.store.scored_entities()], ["score-alice", "score-bob"])
+        with self.store.m1_scores_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "score-aaron", "entity_ref": "person:aaron", "score": 10}) + "\n")
+            f.write(json.dumps({"id": "score-alice-2", "entity_ref": "person:alice", "score": 11}) + "\n")
+
+        self.assertEqual(
+            [r["id"] for r in self.store.scored_entities()],
+            ["score-aaron", "score-alice", "score-alice-2", "score-bob"],
+        )
+
     def test_s1_local_runner_and_cli(self):
         first = run_local_s1(workspace=self.workspace, date=self.date_key)
         second = run_local_s1(workspace=self.workspace, date=self.date_key)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from metaspn_ops.runner import RunnerConfig, WorkerRunner
+from metaspn_ops.sqlite_queue import SQLiteQueue
+from metaspn_ops.types import Result, RunRecord, Task
+
+
+class EchoWorker:
+    name = "enrich"
+
+    def handle(self, task: Task) -> Result:
+        return Result(task_id=task.task_id, status="ok", payload={"seen": task.payload})
+
+
+class SQLiteQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = SQLiteQueue(workspace=self.tmp.name, worker_name="enrich")
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_database_uses_wal_journal(self):
+        conn = sqlite3.connect(str(Path(self.tmp.name) / "queue.sqlite3"))
+        try:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_lock_correctness_under_concurrency(self):
+        self.queue.enqueue_task(Task(task_id="t1", task_type="enrich", payload={"x": 1}))
+
+        got = []
+        lock = threading.Lock()
+
+        def attempt():
+            leased = self.queue.lease_next_task(owner=threading.current_thread().name, lease_seconds=30)
+            with lock:
+                got.append(leased is not None)
+
+        threads = [threading.Thread(target=attempt) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sum(1 for x in got if x), 1)
+
+    def test_leases_without_update_returning(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset, task_id in enumerate(["c", "b", "a"]):
+            self.queue.enqueue_task(Task(task_id=task_id, task_type="x", payload={}), scheduled_for=base - timedelta(seconds=offset))
+
+        with mock.patch("metaspn_ops.sqlite_queue._HAS_RETURNING", False):
+            first = self.queue.lease_next_tasks(owner="r1", lease_seconds=20, n=2)
+            second = self.queue.lease_next_tasks(owner="r2", lease_seconds=20, n=2)
+            self.assertEqual(self.queue.lease_next_tasks(owner="r3", lease_seconds=20, n=2), [])
+
+        self.assertEqual([t.task_id for t, _ in first], ["a", "b"])
+        self.assertEqual([handle for _, handle in second], ["c"])
+        self.assertEqual(self.queue.stats()["locks"], 3)
+
+    def test_ack_keeps_a_copy_enqueued_while_leased(self):
+        self.queue.enqueue_task(Task(task_id="t", task_type="x", payload={"v": 1}))
+        _, handle = self.queue.lease_next_task(owner="a", lease_seconds=30)
+
+        self.queue.enqueue_task(Task(task_id="t", task_type="x", payload={"v": 2}))
+        self.queue.ack_task(handle)
+
+        leased_task, handle = self.queue.lease_next_task(owner="b", lease_seconds=30)
+        self.assertEqual(leased_task.payload, {"v": 2})
+        self.queue.ack_task(handle)
+        self.assertEqual(self.queue.stats()["inbox"], 0)
+
+    def test_retry_deadletter_is_one_transaction(self):
+        self.queue.enqueue_task(Task(task_id="dead", task_type="x", payload={}, max_attempts=1))
+        leased_task, handle = self.queue.lease_next_task(owner="a", lease_seconds=30)
+        self.queue.fail_task(handle, leased_task, "permanent")
+        self.queue._conn.execute(
+            "CREATE TEMP TRIGGER keep_dead BEFORE DELETE ON deadletter BEGIN SELECT RAISE(ABORT, 'kept'); END"
+        )
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.queue.retry_deadletter()
+
+        stats = self.queue.stats()
+        self.assertEqual((stats["inbox"], stats["deadletter"]), (0, 1))
+
+    def test_lease_expiration_behavior(self):
+        self.queue.enqueue_task(Task(task_id="t-lease", task_type="enrich", payload={}))
+
+        first = self.queue.lease_next_task(owner="a", lease_seconds=1)
+        self.assertIsNotNone(first)
+        self.assertIsNone(self.queue.lease_next_task(owner="b", lease_seconds=10))
+
+        time.sleep(1.2)
+        second = self.queue.lease_next_task(owner="b", lease_seconds=10)
+        self.assertIsNotNone(second)
+
+    def test_retry_and_deadletter(self):
+        self.queue.enqueue_task(Task(task_id="t-retry", task_type="enrich", payload={}, max_attempts=2))
+        leased_task, handle = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        self.queue.fail_task(handle, leased_task, "boom")
+
+        self.assertEqual(self.queue.stats()["inbox"], 1)
+        self.assertIsNone(self.queue.lease_next_task(owner="runner", lease_seconds=10))
+
+        self.queue.enqueue_task(leased_task, scheduled_for=datetime.now(timezone.utc) - timedelta(seconds=1))
+        leased_task, handle = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        self.assertEqual(leased_task.attempt_count, 1)
+
+        self.queue.fail_task(handle, leased_task, "permanent")
+        stats = self.queue.stats()
+        self.assertEqual(stats["inbox"], 0)
+        self.assertEqual(stats["deadletter"], 1)
+        self.assertEqual(self.queue.deadletter_items(), ["t-retry"])
+
+        self.assertEqual(self.queue.retry_deadletter(task_id="t-retry"), 1)
+        stats = self.queue.stats()
+        self.assertEqual(stats["inbox"], 1)
+        self.assertEqual(stats["deadletter"], 0)
+
+    def test_finalize_task_writes_result_and_run_then_acks(self):
+        self.queue.enqueue_task(Task(task_id="fin", task_type="x", payload={}))
+        leased_task, handle = self.queue.lease_next_task(owner="runner", lease_seconds=10)
+        record = RunRecord(
+            run_id="run-fin",
+            worker_name="enrich",
+            task_id="fin",
+            started_at="2026-01-01T00:00:00+00:00",
+            finished_at="2026-01-01T00:00:01+00:00",
+            duration_ms=1000,
+            status="ok",
+            error=None,
+            trace_context={},
+        )
+
+        self.queue.finalize_task(handle, Result(task_id="fin", status="ok"), record)
+
+        stats = self.queue.stats()
+        self.assertEqual((stats["inbox"], stats["outbox"], stats["runs"], stats["locks"]), (0, 1, 1, 0))
+
+    def test_deterministic_ordering(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        self.queue.enqueue_task(Task(task_id="c", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=3))
+        self.queue.enqueue_task(Task(task_id="a", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=1))
+        self.queue.enqueue_task(Task(task_id="b", task_type="x", payload={}), scheduled_for=base + timedelta(seconds=2))
+
+        leased_ids = []
+        for _ in range(3):
+            t, handle = self.queue.lease_next_task(owner="runner", lease_seconds=20)
+            leased_ids.append(t.task_id)
+            self.queue.ack_task(handle)
+
+        self.assertEqual(leased_ids, ["a", "b", "c"])
+        self.assertEqual(self.queue.stats()["inbox"], 0)
+
+    def test_lease_next_tasks_takes_a_batch_in_order(self):
+        base = datetime.now(timezone.utc) - timedelta(minutes=1)
+        for offset, task_id in enumerate(["d", "c", "b", "a"]):
+            self.queue.enqueue_task(Task(task_id=task_id, task_type="x", payload={}), scheduled_for=base - timedelta(seconds=offset))
+
+        first = self.queue.lease_next_tasks(owner="r1", lease_seconds=20, n=3)
+        second = self.queue.lease_next_tasks(owner="r2", lease_seconds=20, n=3)
+
+        self.assertEqual([t.task_id for t, _ in first], ["a", "b", "c"])
+        self.assertEqual([handle for _, handle in second], ["d"])
+
+    def test_enqueue_tasks_batch(self):
+        tasks = [Task(task_id=f"b{i}", task_type="x", payload={"i": i}) for i in range(5)]
+        self.assertEqual(self.queue.enqueue_tasks(tasks), [t.task_id for t in tasks])
+        self.assertEqual(self.queue.stats()["inbox"], 5)
+
+    def test_runner_drives_sqlite_queue(self):
+        for i in range(3):
+            self.queue.enqueue_task(Task(task_id=f"t{i}", task_type="enrich", payload={"i": i}))
+
+        processed = WorkerRunner(
+            queue=self.queue,
+            worker=EchoWorker(),
+            config=RunnerConfig(once=True, max_tasks=5, parallel=2),
+        ).run()
+
+        self.assertEqual(processed, 3)
+        stats = self.queue.stats()
+        self.assertEqual(stats["inbox"], 0)
+        self.assertEqual(stats["outbox"], 3)
+        self.assertEqual(stats["runs"], 3)
+
+        conn = sqlite3.connect(str(self.queue.db_path))
+        try:
+            bodies = [json.loads(row[0]) for row in conn.execute("SELECT body FROM results ORDER BY task_id")]
+        finally:
+            conn.close()
+        self.assertEqual([b["payload"]["seen"]["i"] for b in bodies], [0, 1, 2])
+
+    def test_cli_queue_commands_use_sqlite_backend(self):
+        from metaspn_ops.cli import main
+
+        self.queue.enqueue_task(Task(task_id="cli", task_type="enrich", payload={}))
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            exit_code = main(["queue", "stats", "enrich", "--workspace", self.tmp.name, "--backend", "sqlite"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(json.loads(out.getvalue())["inbox"], 1)
+        self.assertFalse((Path(self.tmp.name) / "inbox").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()